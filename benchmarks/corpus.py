@@ -0,0 +1,91 @@
+# benchmarks/corpus.py
+import os
+import random
+
+SERIES_NAME = "Bench Show"
+TMDB_ID = 90001
+
+# One template per naming style the matcher knows, {s}/{e} are the season and local
+# episode number, {g} a release group that keeps names unique within a directory
+STYLES = [
+    ("S00E00", "[{g}] Bench Show - S{s:02d}E{e:02d} [1080p].mkv"),
+    ("S00EP00", "Bench.Show.S{s:02d}EP{e:02d}.{g}.mp4"),
+    ("0x00", "Bench Show {s}x{e:02d} {g}.mkv"),
+    ("0xSpecial 0", "Bench Show {s}xSpecial {e} {g}.mkv"),
+    ("S00E00v0", "[{g}] Bench Show S{s:02d}E{e:02d}v2 [720p].mkv"),
+    ("S00E00 range", "[{g}] Bench Show - S{s:02d}E{e:02d}-{e2:02d} [1080p].mkv"),
+    ("S00E00 subtitle", "[{g}] Bench Show - S{s:02d}E{e:02d} [1080p].ja.ass"),
+    ("S00E00 subtitle lang", "[{g}] Bench Show - S{s:02d}E{e:02d} [1080p].zh-Hans.srt"),
+    ("^0", "{e:02d}. Bench Show {g}.mkv"),
+    ("-0-", "[{g}] Bench Show - {e:02d} [1080p].mkv"),
+    ("-000-", "[{g}] Bench Show - {e:03d} [1080p].mkv"),
+    ("_0_", "Bench_Show_{e:02d}_{g}.mkv"),
+    ("-00v0-", "[{g}] Bench Show - {e:02d}v2 [1080p].mkv"),
+    ("第0話", "ベンチ 第{e}話 {g}.mp4"),
+    (" EP0 ", "Bench Show EP{e} {g}.mkv"),
+    (" Ep0_", "Bench Show Ep{e:02d}_{g}.mkv"),
+    (" E0 ", "Bench Show E{e} {g}.mkv"),
+    (".EP00.", "Bench.Show.EP{e:02d}.{g}.mkv"),
+    ("Vol.0", "Bench Show Vol.{e} {g}.mkv"),
+    ("＃0", "ベンチ ＃{e} {g}.mkv"),
+    ("Episode 0", "Bench Show Episode {e} {g}.mkv"),
+    (" #0", "Bench Show #{e} {g}.mkv"),
+    ("SP00", "Bench Show SP{e:02d} {g}.mkv"),
+    ("[00 END]", "[{g}] Bench Show [{e:02d} END].mkv"),
+    ("[00_END]", "[{g}] Bench Show [{e:02d}_FIN].mkv"),
+    ("-0- range", "[{g}] Bench Show - {e:02d}-{e2:02d} [BD].mkv"),
+    ("no number", "[{g}] Bench Show - Opening Theme.mkv"),
+]
+
+
+def series_data(seasons=10, episodes=100):
+    """Returns (details, {season_number: season_data}) shaped like TMDb responses."""
+    season_data = {}
+    for season_number in range(seasons + 1):  # Season 0 holds the specials
+        count = episodes if season_number else max(1, episodes // 10)
+        season_data[season_number] = {
+            "season_number": season_number,
+            "name": f"Season {season_number}",
+            "episodes": [
+                {"episode_number": n, "season_number": season_number, "name": f"Episode {season_number}-{n}: The Title? Part {n % 3}"}
+                for n in range(1, count + 1)
+            ],
+        }
+    details = {
+        "id": TMDB_ID,
+        "name": SERIES_NAME,
+        "status": "Ended",
+        "in_production": False,
+        "seasons": [{"season_number": n, "episode_count": len(data["episodes"])} for n, data in season_data.items()],
+    }
+    return details, season_data
+
+
+def corpus_names(count, seasons=10, episodes=100, seed=1):
+    """Returns count (directory index, file name, style) tuples cycling through every style.
+
+    Files go into directories of at most 1000, like a large library split in folders.
+    """
+    rng = random.Random(seed)
+    names = []
+    for i in range(count):
+        label, template = STYLES[i % len(STYLES)]
+        season = rng.randint(1, seasons)
+        episode = rng.randint(1, episodes - 1)
+        name = template.format(s=season, e=episode, e2=episode + 1, g=f"G{i // len(STYLES)}")
+        names.append((i // 1000, name, label))
+    return names
+
+
+def create_corpus(root, count, seasons=10, episodes=100, file_size=0, seed=1):
+    """Writes the corpus under root and returns the list of file paths."""
+    paths = []
+    payload = b"\0" * file_size
+    for directory, name, _ in corpus_names(count, seasons, episodes, seed):
+        folder = os.path.join(root, f"batch{directory:03d}")
+        os.makedirs(folder, exist_ok=True)
+        path = os.path.join(folder, name)
+        with open(path, "wb") as f:
+            f.write(payload)
+        paths.append(path)
+    return paths
@@ -0,0 +1,275 @@
+# benchmarks/equivalence.py
+"""Fuzzes EpisodeMatcher against the per-episode regex loop it replaced.
+
+    python -m benchmarks.equivalence --count 2000 --shifts 0 1 -1
+
+Every generated file name is matched by both and the candidates must agree: same
+(season, episode) pairs in the same order, same multi-episode range. The reference picks
+range titles by local episode number, as EpisodeMatcher does; the old loop used TMDb
+numbers there, which was wrong under a shift.
+
+The old loop had no absolute numbering, so "absolute" and "auto" are checked against the
+absolute number -> (season, episode) mapping of the series instead, under every
+NUMBERING_CASES shift, including the names rendered for multi-episode files. Exits with 1
+on any mismatch.
+"""
+import argparse
+import random
+import re
+import sys
+from functools import lru_cache
+
+from tvrename.config import ShiftConfig
+from tvrename.matcher import EpisodeMatcher
+from tvrename.naming import EpisodeNamer
+from tvrename.utils import normalize_filename, sanitize_filename
+
+from .corpus import STYLES, corpus_names, series_data
+
+
+@lru_cache(maxsize=None)
+def reference_patterns(season_number, local_episode_number):
+    """Returns the (range, season, episode) patterns the old process_file built for one episode, compiled.
+
+    The patterns are kept as they were; compiling them once only spares re's cache,
+    which holds far fewer patterns than a series has episodes.
+    """
+    def compile_all(patterns):
+        return [re.compile(pattern, re.IGNORECASE) for pattern in patterns]
+
+    multi_episode_patterns = compile_all([
+        rf"\bS{season_number:02d}E{local_episode_number:02d}-(\d{{2,3}})\b",
+        rf"\b{local_episode_number:02d}-(\d{{2,3}})\b",
+    ])
+    patterns = compile_all([
+        rf"\bS{season_number:02d}E{local_episode_number:02d}\b",
+        rf"\bS{season_number:02d}EP{local_episode_number:02d}\b",
+        rf"\b0?{season_number}x{local_episode_number:02d}\b",
+        rf"\b{season_number}xSpecial {local_episode_number}\b",
+        rf"(-| |\[|.)S{season_number:02d}E{local_episode_number:02d}v\d{{1}}(\]| |-|\[|\.)",
+    ])
+    next_patterns = compile_all([
+        rf"^0?{local_episode_number}(\.| )",
+        rf"(-| |\[|\()0?{local_episode_number}(\]| |-|\[|\.|\))",
+        rf"(-| |\[){local_episode_number:03d}(\]| |-|\[|\.)",
+        rf"_0?{local_episode_number}_",
+        rf"(-| |\[|_){local_episode_number:02d}v\d{{1}}(\(|\]| |-|\[|\.|_)",
+        rf"第0?{local_episode_number}[弾話章话巻怪幕節夜回]",
+        rf" EP0?{local_episode_number} ",
+        rf"( |_)Ep0?{local_episode_number}(_| |\.)",
+        rf" E0?{local_episode_number} ",
+        rf"\.EP{local_episode_number:02d}\.",
+        rf"Vol\.0?{local_episode_number}",
+        rf"Epilogue.0?{local_episode_number}",
+        rf"＃0?{local_episode_number}",
+        rf"Episode 0?{local_episode_number}",
+        rf" #0?{local_episode_number}",
+        rf"(-| |\[|)#({local_episode_number}|{local_episode_number:02d}) ",
+        rf"SP{local_episode_number:02d}",
+        rf"\[{local_episode_number:02d} ?(END|FIN)\]",
+        rf"\[{local_episode_number:02d}_?(END|FIN)\]",
+        rf"Part\.0?{local_episode_number}",
+    ])
+    return multi_episode_patterns, patterns, next_patterns
+
+
+def reference_candidates(filename, season_data_cache, episode_shift=0):
+    """Returns [(season, episode, range_end, range_titles)] the way the old process_file loop found them."""
+    name = normalize_filename(filename)
+    has_season = re.search(r"S\d{2}E\d{2,3}", filename, re.IGNORECASE) or \
+        re.search(r"\b\d{2}x\d{2,3}\b", filename, re.IGNORECASE) or \
+        re.search(r"\d{1,2}xSpecial \d{1,3}", filename, re.IGNORECASE)
+    candidates = []
+    for season_number, season_data in season_data_cache.items():
+        episodes = season_data.get("episodes", [])
+        for episode in episodes:
+            tmdb_episode_number = episode["episode_number"]
+            local_episode_number = tmdb_episode_number - episode_shift
+            if local_episode_number < 0:
+                continue
+            multi_episode_patterns, patterns, next_patterns = reference_patterns(season_number, local_episode_number)
+
+            range_end, range_titles = None, None
+            for pattern in multi_episode_patterns:
+                multi_episode_match = pattern.search(name)
+                if multi_episode_match:
+                    break
+            if multi_episode_match and int(multi_episode_match.group(1)) >= local_episode_number:
+                end = int(multi_episode_match.group(1))
+                # The old loop compared TMDb numbers here, which picked the wrong titles under a shift
+                titles = [
+                    sanitize_filename(ep["name"]) for ep in episodes
+                    if local_episode_number <= ep["episode_number"] - episode_shift <= end
+                ]
+                if titles:
+                    range_end, range_titles = end, titles
+
+            candidate = (season_number, tmdb_episode_number, range_end, range_titles)
+            if any(pattern.search(name) for pattern in patterns):
+                candidates.append(candidate)
+            elif not has_season and any(pattern.search(name) for pattern in next_patterns):
+                candidates.append(candidate)
+    return candidates
+
+
+# (episode_shift, season_shifts) checked in absolute and auto numbering
+NUMBERING_CASES = [
+    (0, ()),
+    (2, ()),
+    (-1, ()),
+    (0, ((2, -12),)),
+    (2, ((2, -12), (3, 1))),
+]
+
+
+def absolute_episode(filename_number, season_data_cache, config):
+    """Returns the (season, episode) at a file's absolute number, counted here over the regular seasons in order, or None."""
+    absolute = [
+        (season_number, ep["episode_number"])
+        for season_number in sorted(season_data_cache) if season_number > 0
+        for ep in sorted(season_data_cache[season_number]["episodes"], key=lambda ep: ep["episode_number"])
+    ]
+    index = filename_number + config.episode_shift - 1
+    return absolute[index] if 0 <= index < len(absolute) else None
+
+
+def expected_numbering(filename_number, season_data_cache, config):
+    """Returns ([(season, episode)], is_absolute) for a bare episode number under an absolute/auto ShiftConfig.
+
+    Per season the number is shifted by the season's season_shifts entry, or not at all.
+    """
+    season_shifts = dict(config.season_shifts)
+    by_season = [
+        (season_number, filename_number + season_shifts.get(season_number, 0))
+        for season_number, season_data in season_data_cache.items()
+        if any(ep["episode_number"] == filename_number + season_shifts.get(season_number, 0) for ep in season_data["episodes"])
+    ]
+    if config.numbering == "auto" and by_season:
+        return by_season, False
+    episode = absolute_episode(filename_number, season_data_cache, config)
+    return ([episode] if episode else []), True
+
+
+def expected_range_name(filename_number, season_data_cache, config):
+    """Returns the {s00e00} name of the first match of "NN-MM" with MM = NN + 1, or None.
+
+    Both numbers are candidates and the earliest episode wins; only the first number carries
+    the range. Ranges read per season are kept like the old loop kept them, absolute ones
+    only when the next absolute episode follows in the same season. Names use TMDb numbers.
+    """
+    matched, is_absolute = expected_numbering(filename_number, season_data_cache, config)
+    following = absolute_episode(filename_number + 1, season_data_cache, config)
+    names = {}
+    for season_number, episode in matched:
+        if not is_absolute or following == (season_number, episode + 1):
+            names[(season_number, episode)] = f"S{season_number:02d}E{episode:02d}-{episode + 1:02d}"
+        else:
+            names[(season_number, episode)] = f"S{season_number:02d}E{episode:02d}"
+    for season_number, episode in expected_numbering(filename_number + 1, season_data_cache, config)[0]:
+        names.setdefault((season_number, episode), f"S{season_number:02d}E{episode:02d}")
+    return names[min(names)] if names else None
+
+
+def check_numbering(season_data_cache, config):
+    """Matches bare numbers, ranges and season markers under an absolute/auto ShiftConfig; returns the mismatches."""
+    matcher = EpisodeMatcher(season_data_cache, config)
+    namer = EpisodeNamer("{s00e00}", "Show", matcher)
+    season_shifts = dict(config.season_shifts)
+    total = sum(len(data["episodes"]) for number, data in season_data_cache.items() if number > 0)
+    mismatches = []
+
+    def check(name, expected, found):
+        if expected != found:
+            mismatches.append((name, expected, found))
+
+    for number in range(0, total + abs(config.episode_shift) + 2):
+        name = f"Show - {number:02d}.mkv"
+        expected = expected_numbering(number, season_data_cache, config)[0]
+        check(name, expected, [(m.season_number, m.episode_number) for m in matcher.match(name)])
+
+        name = f"Show - {number:02d}-{number + 1:02d}.mkv"
+        expected = expected_range_name(number, season_data_cache, config)
+        check(name, [expected] if expected else [], [namer.name(m) for m in matcher.match(name)][:1])
+
+    # Season markers are shifted by season_shifts only, never by episode_shift
+    for season_number, season_data in season_data_cache.items():
+        for ep in season_data["episodes"]:
+            local = ep["episode_number"] - season_shifts.get(season_number, 0)
+            if local >= 0:
+                name = f"Show S{season_number:02d}E{local:02d}.mkv"
+                check(name, [(season_number, ep["episode_number"])], [(m.season_number, m.episode_number) for m in matcher.match(name)])
+    return mismatches
+
+
+# Pieces random names are glued from, around the numbers the patterns look for
+TOKENS = [
+    "[Grp]", "Show", "Bench", " ", " ", "-", " - ", "_", ".", "(", ")", "[", "]", "S", "E", "EP", "Ep", "x",
+    "xSpecial ", "第", "話", "回", "Vol.", "Epilogue.", "＃", "#", "Episode ", "SP", "END", "FIN", "v2", "Part.",
+    "1080p", "ＢＤ", "１２",
+]
+
+
+def random_name(rng, seasons, episodes):
+    """Returns a random file name mixing the tokens with numbers of every padding."""
+    parts = []
+    for _ in range(rng.randint(2, 9)):
+        if rng.random() < 0.4:
+            number = rng.choice([rng.randint(0, seasons + 1), rng.randint(0, episodes + 2), rng.randint(0, 1200)])
+            parts.append(f"{number:0{rng.choice([1, 2, 3])}d}")
+        else:
+            parts.append(rng.choice(TOKENS))
+    return "".join(parts) + rng.choice([".mkv", ".mp4", ".ja.ass", ".srt", ""])
+
+
+def fuzz_names(count, seasons, episodes, seed):
+    """Returns the benchmark corpus names (every style) followed by random names."""
+    rng = random.Random(seed)
+    names = [name for _, name, _ in corpus_names(min(count, len(STYLES) * 50), seasons, episodes, seed)]
+    names.extend(random_name(rng, seasons, episodes) for _ in range(count - len(names)))
+    return names
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Fuzzes EpisodeMatcher against the old per-episode regex loop.")
+    parser.add_argument("--count", type=int, default=2000, help="File names to check per shift (default: 2000).")
+    parser.add_argument("--seasons", type=int, default=3, help="Seasons of the synthetic series (default: 3).")
+    parser.add_argument("--episodes", type=int, default=30, help="Episodes per season of the synthetic series (default: 30).")
+    parser.add_argument("--shifts", nargs="+", type=int, default=[0, 1, -1], help="Episode shifts to check (default: 0 1 -1).")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed (default: 1).")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    season_data_cache = series_data(args.seasons, args.episodes)[1]
+    names = fuzz_names(args.count, args.seasons, args.episodes, args.seed)
+    mismatches = 0
+    for shift in args.shifts:
+        matcher = EpisodeMatcher(season_data_cache, shift)
+        shift_mismatches = 0
+        matched = 0
+        for name in names:
+            expected = reference_candidates(name, season_data_cache, shift)
+            matched += bool(expected)
+            found = [(m.season_number, m.episode_number, m.range_end, m.range_titles) for m in matcher.match(name)]
+            if expected != found:
+                shift_mismatches += 1
+                if shift_mismatches <= 10:
+                    print(f"MISMATCH shift {shift}: {name!r}\n  old: {expected}\n  new: {found}")
+        print(f"shift {shift:+d}: {len(names)} names, {matched} matched, {shift_mismatches} mismatches")
+        mismatches += shift_mismatches
+    for numbering in ("absolute", "auto"):
+        for episode_shift, season_shifts in NUMBERING_CASES:
+            config = ShiftConfig(episode_shift, season_shifts, numbering)
+            found = check_numbering(season_data_cache, config)
+            for name, expected, actual in found[:10]:
+                print(f"MISMATCH {config}: {name!r}\n  expected: {expected}\n  found: {actual}")
+            season_text = ", ".join(f"S{season:02d} {shift:+d}" for season, shift in season_shifts) or "none"
+            print(f"{numbering} shift {episode_shift:+d}, season shifts {season_text}: {len(found)} mismatches")
+            mismatches += len(found)
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
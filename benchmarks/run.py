@@ -0,0 +1,314 @@
+# benchmarks/run.py
+"""Offline benchmarks for tvrename: matching, scanning and file actions.
+
+    python -m benchmarks.run --sizes 100 1000 10000 --output results.json
+    python -m benchmarks.run --compare results.json
+
+Everything runs against a synthetic corpus and a local TMDb stub, no network needed.
+"""
+import argparse
+import contextlib
+import json
+import math
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from tvrename import tmdb
+from tvrename.cache import MetadataCache
+from tvrename.core import APPEND_TO_RESPONSE_LIMIT, fetch_series_seasons, build_plan, execute_plan
+from tvrename.defaults import DEFAULT_IO_WORKERS
+from tvrename.executor import ActionExecutor
+from tvrename.fileops import InodeIndex
+from tvrename.matcher import EpisodeMatcher
+from tvrename.scanner import InputScanner
+from tvrename.utils import sanitize_filename
+
+from .corpus import SERIES_NAME, TMDB_ID, corpus_names, create_corpus
+from .stub import TMDbStub
+
+RESULTS_VERSION = 1
+DEFAULT_SIZES = [100, 1000, 10000]
+BENCHMARKS = ["startup", "fetch", "match", "scan", "dry-run", "hardlink", "copy"]
+ACTION_BENCHMARKS = ["dry-run", "hardlink", "copy"]
+STARTUP_BUDGET_MS = 80  # Import time of tvrename.main, what every invocation pays before doing anything
+
+
+def measure(func, repeat, setup=None, teardown=None):
+    """Runs func repeat times and returns the wall clock seconds of every run."""
+    runs = []
+    for _ in range(repeat):
+        state = setup() if setup else None
+        start = time.perf_counter()
+        func(state)
+        runs.append(time.perf_counter() - start)
+        if teardown:
+            teardown(state)
+    return runs
+
+
+def result(benchmark, files, runs, **extra):
+    """Builds one result record; files/sec is computed from the fastest run."""
+    best = min(runs)
+    return {
+        "benchmark": benchmark,
+        "files": files,
+        "seconds": best,
+        "median_seconds": statistics.median(runs),
+        "files_per_sec": files / best if files and best > 0 else None,
+        "runs": runs,
+        **extra,
+    }
+
+
+@contextlib.contextmanager
+def quiet():
+    """Silences the per-file output of tvrename while keeping its formatting cost."""
+    with open(os.devnull, "w", encoding="utf-8") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def bench_startup(args):
+    """Imports tvrename.main in fresh interpreters under -X importtime and reports its cumulative import time."""
+    runs = []
+    slowest = []
+    for _ in range(args.repeat):
+        stderr = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", "import tvrename.main"], capture_output=True, text=True, check=True,
+            cwd=Path(__file__).resolve().parent.parent,
+        ).stderr
+        imports = []  # (cumulative microseconds, module) of what tvrename.main imports, nested lines come first
+        for line in stderr.splitlines():
+            fields = line.removeprefix("import time:").split("|")
+            if len(fields) != 3 or not fields[1].strip().isdigit():
+                continue
+            if fields[2].strip() == "tvrename.main":
+                runs.append(int(fields[1]) / 1e6)
+                break
+            if not fields[2][1:].startswith(" "):
+                imports = []  # A top-level import done before tvrename.main
+            else:
+                imports.append((int(fields[1]), fields[2].strip()))
+        if runs[-1] == min(runs):
+            slowest = [(module, us / 1000) for us, module in sorted(imports, reverse=True)[:5]]
+    return result("startup", 0, runs, budget_ms=args.startup_budget, slowest_imports_ms=slowest)
+
+
+def request_budget(season_numbers):
+    """Returns the requests a cold fetch of these seasons may take.
+
+    The details carry seasons 0 to APPEND_TO_RESPONSE_LIMIT - 1 on the first request; the
+    other seasons take one more request per batch. For seasons 0 to N - 1 that is
+    ceil(N / APPEND_TO_RESPONSE_LIMIT).
+    """
+    rest = [n for n in season_numbers if n not in range(APPEND_TO_RESPONSE_LIMIT)]
+    return 1 + math.ceil(len(rest) / APPEND_TO_RESPONSE_LIMIT)
+
+
+def fetch_metadata(stub, repeat):
+    """Fetches the series through the stub, uncached and from a warm cache, and returns (episode table, result).
+
+    Requests are counted by the stub: `requests` per cold fetch, `cached_requests` for a
+    fetch answered by the metadata cache, and `request_budget` for what a cold fetch may take.
+    """
+    client = tmdb.TMDbClient("bench", rate_limit=0)
+    details, episode_table = None, None
+
+    def run(_):
+        nonlocal details, episode_table
+        details, episode_table = fetch_series_seasons(str(TMDB_ID), client, "en-US")[:2]
+
+    before = stub.requests
+    runs = measure(run, repeat)
+    requests = (stub.requests - before) // repeat
+    client.close()
+
+    cache_dir = tempfile.mkdtemp(prefix="tvrename-bench-cache-")
+    try:
+        client = tmdb.TMDbClient("bench", cache=MetadataCache(cache_dir), rate_limit=0)
+        fetch_series_seasons(str(TMDB_ID), client, "en-US")
+        before = stub.requests
+        fetch_series_seasons(str(TMDB_ID), client, "en-US")
+        cached_requests = stub.requests - before
+        client.close()
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    budget = request_budget({s["season_number"] for s in details.get("seasons", [])}) if details else 0
+    episodes = len(episode_table) if episode_table else 0
+    return episode_table, result("fetch", 0, runs, requests=requests, cached_requests=cached_requests, request_budget=budget, episodes=episodes)
+
+
+def bench_match(matcher, size, args):
+    """Plans a corpus of file names that do not exist on disk (matching cost only)."""
+    root = Path(tempfile.gettempdir()) / "tvrename-bench-missing"
+    files = [root / f"batch{directory:03d}" / name for directory, name, _ in corpus_names(size, args.seasons, args.episodes)]
+    planned = {}
+
+    def run(_):
+        planned["plan"] = build_plan(files, SERIES_NAME, matcher, "dry-run", None)
+
+    runs = measure(run, args.repeat)
+    matched = len(planned["plan"])
+    return result("match", size, runs, matched=matched)
+
+
+def bench_scan(root, size, args):
+    """Walks the corpus on disk the way run_series does."""
+    found = {}
+
+    def run(_):
+        found["files"] = sum(1 for _ in InputScanner([str(root)], recursive=True))
+
+    runs = measure(run, args.repeat)
+    return result("scan", size, runs, found=found["files"])
+
+
+def bench_action(action, matcher, root, size, args):
+    """Plans and applies an action over the on-disk corpus, removing what it created after each run."""
+    files = list(InputScanner([str(root)], recursive=True))
+
+    def setup(_=None):
+        return build_plan(files, SERIES_NAME, matcher, action, None)
+
+    def run(plan):
+        with quiet(), ActionExecutor(args.io_workers) as executor:
+            execute_plan(plan, False, InodeIndex(), executor=executor)
+
+    def teardown(plan):
+        if action == "dry-run":
+            return
+        for entry in plan:
+            if entry.status == "ok" and os.path.lexists(entry.target):
+                os.unlink(entry.target)
+
+    plan = setup()
+    applied = sum(1 for entry in plan if entry.status == "ok")
+    teardown(plan)
+    runs = measure(run, args.repeat, setup, teardown)
+    return result(action, size, runs, applied=applied)
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=Path(__file__).resolve().parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_result(record):
+    rate = f"{record['files_per_sec']:>12,.0f} files/s" if record["files_per_sec"] else " " * 20
+    extra = ", ".join(f"{key} {value}" for key, value in record.items() if key in ("requests", "cached_requests", "request_budget", "episodes", "matched", "found", "applied", "budget_ms"))
+    print(f"{record['benchmark']:<10} {record['files']:>8} files {record['seconds']:>9.4f} s {rate}  {extra}")
+
+
+def compare(results, baseline_path, tolerance):
+    """Prints the change against a saved run and returns the number of regressions."""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {(r["benchmark"], r["files"]): r for r in json.load(f)["results"]}
+    regressions = 0
+    print(f"\nCompared with {baseline_path} (tolerance {tolerance:.0%}):")
+    for record in results:
+        old = baseline.get((record["benchmark"], record["files"]))
+        if not old:
+            continue
+        change = record["seconds"] / old["seconds"] - 1 if old["seconds"] > 0 else 0.0
+        status = "REGRESSION" if change > tolerance else ("faster" if change < -tolerance else "same")
+        regressions += status == "REGRESSION"
+        print(f"{record['benchmark']:<10} {record['files']:>8} files {old['seconds']:>9.4f} s -> {record['seconds']:>9.4f} s ({change:+.1%}) {status}")
+    return regressions
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Offline benchmarks for tvrename.")
+    parser.add_argument("--sizes", nargs="+", type=int, default=DEFAULT_SIZES, help=f"Corpus sizes in files (default: {' '.join(map(str, DEFAULT_SIZES))}).")
+    parser.add_argument("--benchmarks", nargs="+", choices=BENCHMARKS, default=BENCHMARKS, help="Benchmarks to run (default: all).")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per benchmark, the fastest is reported (default: 3).")
+    parser.add_argument("--seasons", type=int, default=10, help="Seasons of the synthetic series (default: 10).")
+    parser.add_argument("--episodes", type=int, default=100, help="Episodes per season of the synthetic series (default: 100).")
+    parser.add_argument("--io-workers", type=int, default=DEFAULT_IO_WORKERS, help=f"Threads applying the actions (default: {DEFAULT_IO_WORKERS}).")
+    parser.add_argument("--file-size", type=int, default=4096, help="Bytes per corpus file, what --action copy copies (default: 4096).")
+    parser.add_argument("--fixtures", help="Directory of recorded TMDb responses (tv_ID.json, tv_ID_season_N.json) to serve instead of the synthetic series.")
+    parser.add_argument("--workdir", help="Directory for the on-disk corpus (default: a temporary directory).")
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    parser.add_argument("--compare", metavar="BASELINE", help="Compare with the results of an earlier run.")
+    parser.add_argument("--startup-budget", type=float, default=STARTUP_BUDGET_MS, help=f"Milliseconds tvrename.main may take to import, exceeding it fails the run (default: {STARTUP_BUDGET_MS}).")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Slowdown reported as a regression by --compare (default: 0.10).")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    args.repeat = max(1, args.repeat)
+    stub = TMDbStub(args.fixtures, args.seasons, args.episodes)
+    tmdb.TMDB_API_URL = stub.start()
+    results = []
+    if "startup" in args.benchmarks:
+        results.append(bench_startup(args))
+        print_result(results[-1])
+    try:
+        episode_table, fetch_result = fetch_metadata(stub, args.repeat)
+        if "fetch" in args.benchmarks:
+            results.append(fetch_result)
+            print_result(fetch_result)
+        if not episode_table:
+            raise SystemExit("The stub served no season data")
+        matcher = EpisodeMatcher(episode_table)
+
+        for size in args.sizes:
+            if "match" in args.benchmarks:
+                results.append(bench_match(matcher, size, args))
+                print_result(results[-1])
+            if not {"scan", *ACTION_BENCHMARKS} & set(args.benchmarks):
+                continue
+            workdir = tempfile.mkdtemp(prefix="tvrename-bench-", dir=args.workdir)
+            try:
+                root = Path(workdir) / sanitize_filename(f"{SERIES_NAME} [tmdbid-{TMDB_ID}]")
+                create_corpus(root, size, args.seasons, args.episodes, args.file_size)
+                if "scan" in args.benchmarks:
+                    results.append(bench_scan(root, size, args))
+                    print_result(results[-1])
+                for action in ACTION_BENCHMARKS:
+                    if action in args.benchmarks:
+                        results.append(bench_action(action, matcher, root, size, args))
+                        print_result(results[-1])
+            finally:
+                shutil.rmtree(workdir, ignore_errors=True)
+    finally:
+        stub.stop()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({
+                "version": RESULTS_VERSION,
+                "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "commit": git_commit(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpus": os.cpu_count(),
+                "args": vars(args),
+                "results": results,
+            }, f, indent=2)
+        print(f"Results written to {args.output}")
+    over_budget = [record for record in results if record["benchmark"] == "startup" and record["seconds"] * 1000 > record["budget_ms"]]
+    for record in over_budget:
+        print(f"Startup over budget: {record['seconds'] * 1000:.1f} ms > {record['budget_ms']:g} ms ({', '.join(f'{module} {ms:.1f} ms' for module, ms in record['slowest_imports_ms'])})")
+    over_requests = fetch_result["requests"] > fetch_result["request_budget"] or fetch_result["cached_requests"] > 0
+    if over_requests:
+        print(f"TMDb requests over budget: {fetch_result['requests']} cold (budget {fetch_result['request_budget']}), {fetch_result['cached_requests']} cached (budget 0)")
+    if args.compare and compare(results, args.compare, args.tolerance) or over_budget or over_requests:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# benchmarks/stub.py
+import json
+import os
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from .corpus import series_data
+
+SERIES_PATH = re.compile(r"^/tv/(\d+)$")
+SEASON_PATH = re.compile(r"^/tv/(\d+)/season/(\d+)$")
+
+
+class TMDbStub:
+    """Local stand-in for the TMDb endpoints tvrename uses, served from memory.
+
+    Serves /search/tv, /tv/{id} (with append_to_response) and /tv/{id}/season/{n}.
+    The series comes from recorded responses in fixtures_dir (tv_{id}.json and
+    tv_{id}_season_{n}.json) when given, otherwise it is generated by series_data.
+    """
+
+    def __init__(self, fixtures_dir=None, seasons=10, episodes=100):
+        if fixtures_dir:
+            self.series, self.seasons = {}, {}
+            for name in sorted(os.listdir(fixtures_dir)):
+                match = re.match(r"^tv_(\d+)(?:_season_(\d+))?\.json$", name)
+                if not match:
+                    continue
+                with open(os.path.join(fixtures_dir, name), encoding="utf-8") as f:
+                    data = json.load(f)
+                if match.group(2) is None:
+                    self.series[int(match.group(1))] = data
+                else:
+                    self.seasons[(int(match.group(1)), int(match.group(2)))] = data
+        else:
+            details, season_data = series_data(seasons, episodes)
+            self.series = {details["id"]: details}
+            self.seasons = {(details["id"], n): data for n, data in season_data.items()}
+        self.requests = 0
+        self._server = None
+
+    def respond(self, path, query):
+        """Returns (status, body) for a request path and its parsed query string."""
+        self.requests += 1
+        if path == "/search/tv":
+            text = query.get("query", [""])[0].lower()
+            return 200, {"results": [s for s in self.series.values() if text in s["name"].lower()]}
+        match = SEASON_PATH.match(path)
+        if match:
+            season = self.seasons.get((int(match.group(1)), int(match.group(2))))
+            return (200, season) if season else (404, {"status_message": "Not found"})
+        match = SERIES_PATH.match(path)
+        if match:
+            tmdb_id = int(match.group(1))
+            if tmdb_id not in self.series:
+                return 404, {"status_message": "Not found"}
+            body = dict(self.series[tmdb_id])
+            for item in query.get("append_to_response", [""])[0].split(","):
+                number = item[len("season/"):] if item.startswith("season/") else ""
+                if number.isdigit() and (tmdb_id, int(number)) in self.seasons:
+                    body[item] = self.seasons[(tmdb_id, int(number))]
+            return 200, body
+        return 404, {"status_message": "Not found"}
+
+    def start(self):
+        """Starts serving on a free local port and returns the base URL."""
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                status, body = stub.respond(url.path, parse_qs(url.query))
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
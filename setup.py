@@ -4,7 +4,7 @@ from setuptools import setup, find_packages
 setup(
     name='tvrename',
     version='0.1.0',
-    packages=find_packages(),
+    packages=find_packages(exclude=['benchmarks']),
     entry_points={
         'console_scripts': [
             'tvrename = tvrename.main:main',
@@ -16,6 +16,10 @@ setup(
         'colorama',
         'configparser',
     ],
+    extras_require={
+        'titlematch': ['rapidfuzz', 'numpy', 'pykakasi'],
+        'fasthash': ['xxhash', 'blake3'],
+    },
     author='Angus Learn',
     author_email='angus.learn@gmail.com',
     description='A command-line tool to rename and organize TV series files.',
@@ -1,18 +1,68 @@
 # tvrename/args.py
 import argparse
+from .defaults import (
+    DEFAULT_TTL_HOURS, DEFAULT_AIRING_TTL_HOURS, DEFAULT_MAX_SIZE_MB, DEFAULT_LIBRARY_WORKERS, DEFAULT_JOBS,
+    DEFAULT_IO_WORKERS, DEFAULT_METADATA_PER_DEVICE, DEFAULT_COPIES_PER_DEVICE, VERIFY_LEVELS, DEFAULT_VERIFY,
+    DEFAULT_TITLE_THRESHOLD, DEFAULT_SETTLE, DEFAULT_POLL_INTERVAL, DEFAULT_WATCH_REFRESH_HOURS,
+    DEFAULT_TIMEOUT, DEFAULT_WORKERS, DEFAULT_RATE_LIMIT, DEFAULT_MAX_RETRIES,
+)
 
-def parse_arguments():
-    """Parses command-line arguments."""
+
+def parse_arguments(argv=None):
+    """Parses command-line arguments, or the list argv (e.g. ["--q", "12345", "--action", "copy"])."""
     parser = argparse.ArgumentParser(description="Rename and organize series files.")
+    parser.add_argument("command", nargs='?', choices=["watch", "metadata"], help="\"watch\": keep running and process new files in the input folders (or --library) as they finish downloading. \"metadata export\": write the series of --series/--series-file to --metadata-bundle for offline runs.")
+    parser.add_argument("subcommand", nargs='?', choices=["export"], help=argparse.SUPPRESS)
     parser.add_argument("--q", help="TMDb ID or series title to search for.")
     parser.add_argument("--input", nargs='+', help="Path to the input directory or file (supports wildcards). Accepts multiple patterns.", default=["."])
-    parser.add_argument("--format", help="Custom format for renaming files. Use placeholders like {n} for series, {t} for title, and {s00e00} for season and episode. (e.g. {t} - {s00e00} - {e})")
+    parser.add_argument("--format", help="Custom format for renaming files. Use placeholders like {n} for series, {t} for title, {s00e00} for season and episode, {e} for the episode number, {y} for the air year and {abs} for the absolute number, optionally truncated with .take(N). (e.g. {n} - {s00e00} - {t.take(40)})")
     parser.add_argument("--lang", default="ja-JP", help="Language for TMDb data in ISO 639-1 format (default: ja-JP).")
     parser.add_argument("--season", type=int, help="Process only a specific season (default: all).")
     parser.add_argument("--output", help="Output directory for renamed files.")
-    parser.add_argument("--action", choices=["dry-run", "rename", "copy", "hardlink"], default="dry-run", help="Action to perform (default: dry-run).")
+    parser.add_argument("--action", choices=["dry-run", "rename", "copy", "hardlink"], help="Action to perform (default: dry-run, or the action stored in the plan with --apply-plan).")
     parser.add_argument("-r", "--recursive", action="store_true", help="Process files recursively in the input directory.")
+    parser.add_argument("--include", action="append", metavar="GLOB", help="Only process files whose name matches GLOB (e.g. \"*[Group]*\"). Can be given more than once.")
+    parser.add_argument("--exclude", action="append", metavar="GLOB", help="Skip files whose name matches GLOB (e.g. \"*NCOP*\"). Can be given more than once.")
+    parser.add_argument("--extensions", nargs='+', metavar="EXT", help="Only process files with these extensions (e.g. mkv .ass), or the groups \"video\" and \"subtitle\" (default: all files).")
     parser.add_argument("--rename-hardlink", action="store_true", help="When using hardlink, rename the destination file if it has the same inode but a different name. Use only with --action hardlink.")
     parser.add_argument("--title-match", action="store_true", help="Use fuzzy matching for episode titles using pykakasi and rapidfuzz.")
-    return parser.parse_args()
+    parser.add_argument("--title-threshold", type=float, default=DEFAULT_TITLE_THRESHOLD, help=f"Minimum similarity (0-100) for a --title-match match (default: {DEFAULT_TITLE_THRESHOLD}).")
+    parser.add_argument("--cache-dir", help="Directory for the TMDb metadata cache (default: ~/.cache/tvrename, C:\\tvrename\\cache on Windows).")
+    parser.add_argument("--no-cache", action="store_true", help="Do not read or write the TMDb metadata cache.")
+    parser.add_argument("--refresh", action="store_true", help="Ignore cached TMDb data and fetch it again, updating the cache.")
+    parser.add_argument("--cache-ttl", type=float, default=DEFAULT_TTL_HOURS, help=f"Hours before cached TMDb data is revalidated (default: {DEFAULT_TTL_HOURS}).")
+    parser.add_argument("--cache-airing-ttl", type=float, default=DEFAULT_AIRING_TTL_HOURS, help=f"Hours before cached data of a still airing series is revalidated (default: {DEFAULT_AIRING_TTL_HOURS}).")
+    parser.add_argument("--cache-max-size", type=float, default=DEFAULT_MAX_SIZE_MB, help=f"Maximum size of the metadata cache in MB (default: {DEFAULT_MAX_SIZE_MB}).")
+    parser.add_argument("--journal", metavar="PATH", help="Journal of the decisions of earlier runs, used to skip unchanged files (default: journal.sqlite3 in the cache directory).")
+    parser.add_argument("--no-journal", action="store_true", help="Do not read or write the journal.")
+    parser.add_argument("--rescan", action="store_true", help="Match every file again even if the journal says it is unchanged, updating the journal.")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help=f"Number of concurrent TMDb requests when fetching seasons (default: {DEFAULT_WORKERS}).")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help=f"Seconds to wait for a TMDb response (default: {DEFAULT_TIMEOUT}).")
+    parser.add_argument("--rate-limit", type=float, default=DEFAULT_RATE_LIMIT, help=f"Maximum TMDb requests per second, 0 to disable (default: {DEFAULT_RATE_LIMIT}).")
+    parser.add_argument("--max-retries", type=int, default=DEFAULT_MAX_RETRIES, help=f"Retries for a throttled or failed TMDb request (default: {DEFAULT_MAX_RETRIES}).")
+    parser.add_argument("--library", metavar="ROOT", help="Process every series folder (e.g. \"Series Name [tmdbid-12345]\") under ROOT in one run. With --output, each series goes to its own subfolder.")
+    parser.add_argument("--library-workers", type=int, default=DEFAULT_LIBRARY_WORKERS, help=f"Number of series processed in parallel in --library mode (default: {DEFAULT_LIBRARY_WORKERS}).")
+    parser.add_argument("--jobs", type=int, default=DEFAULT_JOBS, help=f"Number of processes matching file names, 0 for one per CPU. Only used for large file sets (default: {DEFAULT_JOBS}).")
+    parser.add_argument("--io-workers", type=int, default=DEFAULT_IO_WORKERS, help=f"Number of renames, hardlinks and copies running at the same time, 1 to apply them one by one (default: {DEFAULT_IO_WORKERS}).")
+    parser.add_argument("--metadata-per-device", type=int, default=DEFAULT_METADATA_PER_DEVICE, help=f"Maximum concurrent renames and hardlinks on one destination device (default: {DEFAULT_METADATA_PER_DEVICE}).")
+    parser.add_argument("--copies-per-device", type=int, default=DEFAULT_COPIES_PER_DEVICE, help=f"Maximum concurrent copies to one destination device, 1 on spinning disks (default: {DEFAULT_COPIES_PER_DEVICE}).")
+    parser.add_argument("--verify", choices=VERIFY_LEVELS, default=DEFAULT_VERIFY, help=f"How an existing copy or hardlink target is compared with its source: size only, size and sampled blocks, or a full hash (xxhash or BLAKE3 when installed) (default: {DEFAULT_VERIFY}).")
+    parser.add_argument("--export-plan", metavar="PATH", help="Match the files and write the rename plan to a JSON file instead of applying it.")
+    parser.add_argument("--apply-plan", metavar="PATH", help="Apply a plan written by --export-plan without contacting TMDb.")
+    parser.add_argument("--metadata-bundle", metavar="PATH", help="Resolve series and seasons from a bundle written by \"metadata export\" instead of TMDb, without any request or API key. With \"metadata export\", the bundle to write.")
+    parser.add_argument("--series", nargs='+', metavar="ID_OR_TITLE", help="metadata export: TMDb IDs or titles of the series to export.")
+    parser.add_argument("--series-file", metavar="PATH", help="metadata export: file with one TMDb ID or title per line.")
+    parser.add_argument("--settle", type=float, default=DEFAULT_SETTLE, help=f"watch: seconds a new file must stop growing before it is processed (default: {DEFAULT_SETTLE:g}).")
+    parser.add_argument("--poll", action="store_true", help="watch: poll the folders instead of using inotify.")
+    parser.add_argument("--poll-interval", type=float, default=DEFAULT_POLL_INTERVAL, help=f"watch: seconds between polls (default: {DEFAULT_POLL_INTERVAL:g}).")
+    parser.add_argument("--watch-refresh", type=float, default=DEFAULT_WATCH_REFRESH_HOURS, help=f"watch: hours between metadata refreshes of a watched series (default: {DEFAULT_WATCH_REFRESH_HOURS:g}).")
+    parser.add_argument("--process-existing", action="store_true", help="watch: also process the files already in the folders when the watch starts.")
+    parser.add_argument("--stats", action="store_true", help="Print time spent per stage (config, scan, metadata, match, action), HTTP, cache and copy statistics at the end of the run.")
+    parser.add_argument("--stats-json", metavar="PATH", help="Write the run statistics to a JSON file.")
+    parser.add_argument("--profile", metavar="PATH", help="Profile the run and write the report to PATH.")
+    parser.add_argument("--profiler", choices=["cprofile", "pyinstrument"], default="cprofile", help="Profiler used by --profile (default: cprofile; pyinstrument must be installed).")
+    args = parser.parse_args(argv)
+    if args.action is None and not args.apply_plan:
+        args.action = "dry-run"
+    return args
 
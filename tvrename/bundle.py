@@ -0,0 +1,201 @@
+# tvrename/bundle.py
+import json
+import os
+import sqlite3
+import zlib
+from datetime import datetime, timezone
+from pathlib import Path
+
+from .core import fetch_series_details, fetch_series_seasons, season_episode_counts
+from .episodes import Episode, EpisodeTable
+
+BUNDLE_VERSION = 1
+BUNDLE_MMAP_SIZE = 256 * 1024 * 1024  # Bytes of the bundle SQLite may map instead of reading
+EXPORT_BATCH = 50  # Series fetched concurrently before they are written out
+
+# Fields of the series details that tvrename reads
+DETAIL_FIELDS = ("id", "name", "original_name", "status", "in_production", "first_air_date")
+
+# Bold colors
+red_bold = "\033[1;31m"
+green_bold = "\033[1;32m"
+
+# Reset
+reset = "\033[0m"
+
+
+def _pack(value):
+    return zlib.compress(json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+
+def _unpack(blob):
+    return json.loads(zlib.decompress(blob).decode("utf-8"))
+
+
+def title_key(title):
+    """Normalizes a series title or search query for bundle lookups."""
+    return " ".join(str(title).casefold().split())
+
+
+class MetadataBundle:
+    """Read-only view of a metadata bundle written by BundleWriter.
+
+    A bundle is an SQLite file with one zlib-compressed JSON row per series and per
+    season, indexed by TMDb ID, language and season, plus an index of titles. Opening it
+    reads nothing but the version, and each lookup reads only the rows it needs through
+    SQLite's memory map, so a bundle of thousands of series opens in milliseconds.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        if not self.path.is_file():
+            raise Exception(f"Metadata bundle not found: {self.path}")
+        self._db = sqlite3.connect(f"{self.path.resolve().as_uri()}?mode=ro", uri=True, check_same_thread=False)
+        self._db.execute(f"PRAGMA mmap_size = {BUNDLE_MMAP_SIZE}")
+        try:
+            row = self._db.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        except sqlite3.DatabaseError as e:
+            raise Exception(f"{self.path} is not a metadata bundle: {e}")
+        if not row or int(row[0]) != BUNDLE_VERSION:
+            raise Exception(f"Unsupported metadata bundle version {row[0] if row else None} in {self.path}")
+
+    def find(self, query, lang):
+        """Returns the TMDb ID of the series exported for this title or query, or None."""
+        row = self._db.execute("SELECT tmdb_id FROM titles WHERE title = ? AND lang = ?", (title_key(query), lang)).fetchone()
+        return str(row[0]) if row else None
+
+    def details(self, tmdb_id, lang):
+        """Returns the stored series details, or None when the series is not in the bundle."""
+        row = self._db.execute("SELECT details FROM series WHERE tmdb_id = ? AND lang = ?", (int(tmdb_id), lang)).fetchone()
+        return _unpack(row[0]) if row else None
+
+    def season(self, tmdb_id, lang, season_number):
+        """Returns the Episode records of one season, or None when it is not in the bundle."""
+        row = self._db.execute(
+            "SELECT episodes FROM seasons WHERE tmdb_id = ? AND lang = ? AND season_number = ?", (int(tmdb_id), lang, season_number),
+        ).fetchone()
+        if row is None:
+            return None
+        return [Episode(season_number, episode, title, air_date) for episode, title, air_date in _unpack(row[0])]
+
+    def fetch_details(self, query, lang):
+        """Resolves fetch_series_details: the details of a TMDb ID or exported title."""
+        tmdb_id = query if str(query).isdigit() else self.find(query, lang)
+        details = self.details(tmdb_id, lang) if tmdb_id else None
+        if details is None:
+            raise Exception(f" =Failure= No series matching {query} ({lang}) in the metadata bundle {self.path}")
+        return details
+
+    def fetch_seasons(self, tmdb_id, lang, season=None):
+        """Resolves fetch_series_seasons: returns (details, EpisodeTable, failed)."""
+        details = self.fetch_details(str(tmdb_id), lang)
+        season_numbers = [season] if season is not None else [s["season_number"] for s in details.get("seasons", [])]
+        seasons = {}
+        failed = {}
+        for season_number in season_numbers:
+            episodes = self.season(tmdb_id, lang, season_number)
+            if episodes is None:
+                failed[season_number] = 404  # Not exported
+            else:
+                seasons[season_number] = episodes
+        return details, EpisodeTable(seasons, season_episode_counts(details)), failed
+
+    def close(self):
+        self._db.close()
+
+
+class BundleWriter:
+    """Writes a metadata bundle; the file appears under its final name once close() commits it."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.tmp = self.path.with_name(f".{self.path.name}.tvrename-{os.getpid()}.tmp")
+        if self.tmp.exists():
+            self.tmp.unlink()
+        self._db = sqlite3.connect(str(self.tmp))
+        self._db.executescript(
+            "CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);"
+            "CREATE TABLE series (tmdb_id INTEGER NOT NULL, lang TEXT NOT NULL, details BLOB NOT NULL, PRIMARY KEY (tmdb_id, lang)) WITHOUT ROWID;"
+            "CREATE TABLE seasons (tmdb_id INTEGER NOT NULL, lang TEXT NOT NULL, season_number INTEGER NOT NULL, episodes BLOB NOT NULL,"
+            " PRIMARY KEY (tmdb_id, lang, season_number)) WITHOUT ROWID;"
+            "CREATE TABLE titles (title TEXT NOT NULL, lang TEXT NOT NULL, tmdb_id INTEGER NOT NULL, PRIMARY KEY (title, lang)) WITHOUT ROWID;"
+        )
+        self.series = set()
+
+    def add(self, details, episode_table, lang, queries=()):
+        """Stores one series: its details, its EpisodeTable and the titles it can be found by."""
+        tmdb_id = int(details["id"])
+        # Seasons that could not be exported keep their episode count for the absolute numbers
+        counts = season_episode_counts(details)
+        counts.update((season_number, len(episodes)) for season_number, episodes in episode_table.seasons.items())
+        details = {field: details[field] for field in DETAIL_FIELDS if field in details}
+        details["seasons"] = [{"season_number": season_number, "episode_count": counts[season_number]} for season_number in sorted(counts)]
+        self._db.execute("INSERT OR REPLACE INTO series VALUES (?, ?, ?)", (tmdb_id, lang, _pack(details)))
+        for season_number, episodes in episode_table.seasons.items():
+            self._db.execute(
+                "INSERT OR REPLACE INTO seasons VALUES (?, ?, ?, ?)",
+                (tmdb_id, lang, season_number, _pack([(episode.episode, episode.title, episode.air_date) for episode in episodes])),
+            )
+        # A name never takes over a title another series was exported for, an explicit query does
+        for title in [details.get("name"), details.get("original_name")]:
+            if title:
+                self._db.execute("INSERT OR IGNORE INTO titles VALUES (?, ?, ?)", (title_key(title), lang, tmdb_id))
+        for query in queries:
+            if not str(query).isdigit():
+                self._db.execute("INSERT OR REPLACE INTO titles VALUES (?, ?, ?)", (title_key(query), lang, tmdb_id))
+        self.series.add(tmdb_id)
+
+    def close(self):
+        created = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        self._db.executemany("INSERT OR REPLACE INTO meta VALUES (?, ?)", [("version", str(BUNDLE_VERSION)), ("created", created), ("series", str(len(self.series)))])
+        self._db.commit()
+        self._db.execute("VACUUM")
+        self._db.close()
+        os.replace(self.tmp, self.path)
+
+    def abort(self):
+        self._db.close()
+        self.tmp.unlink(missing_ok=True)
+
+
+def read_queries(series, series_file=None):
+    """Returns the TMDb IDs and titles given with --series and in --series-file (one per line, # comments)."""
+    queries = list(series or [])
+    if series_file:
+        with open(series_file, encoding="utf-8") as f:
+            queries.extend(line.strip() for line in f if line.strip() and not line.lstrip().startswith("#"))
+    return queries
+
+
+def export_bundle(path, queries, client, lang="ja-JP"):
+    """Fetches every series in queries (TMDb IDs or titles) and writes them to a bundle at path.
+
+    Returns the number of series that could not be exported.
+    """
+    def fetch(query):
+        try:
+            tmdb_id = query if query.isdigit() else str(fetch_series_details(query, client, lang)["id"])
+            details, episode_table, failed = fetch_series_seasons(tmdb_id, client, lang)
+            return query, details, episode_table, failed, None
+        except Exception as e:
+            return query, None, None, None, e
+
+    writer = BundleWriter(path)
+    failures = 0
+    try:
+        for start in range(0, len(queries), EXPORT_BATCH):
+            for query, details, episode_table, failed, error in client.map(fetch, queries[start:start + EXPORT_BATCH]):
+                if error:
+                    failures += 1
+                    print(f"{red_bold}[FAILED]{reset} {query}: {error}")
+                    continue
+                writer.add(details, episode_table, lang, [query])
+                missing = f" {red_bold}(failed seasons: {', '.join(map(str, sorted(failed)))}){reset}" if failed else ""
+                print(f"[OK] {details['name']} [tmdbid-{details['id']}]: {len(episode_table.seasons)} season(s), {len(episode_table)} episode(s){missing}")
+    except BaseException:
+        writer.abort()
+        raise
+    writer.close()
+    print(f"{green_bold}Metadata bundle written to {path}: {len(writer.series)} series{reset}")
+    return failures
+
@@ -0,0 +1,138 @@
+# tvrename/cache.py
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from .defaults import DEFAULT_TTL_HOURS, DEFAULT_AIRING_TTL_HOURS, DEFAULT_MAX_SIZE_MB
+
+
+def default_cache_dir():
+    """Returns the default metadata cache directory for this OS."""
+    if os.name == 'nt':
+        return Path("C:\\tvrename\\cache")
+    return Path(os.getenv("XDG_CACHE_HOME", Path.home() / ".cache")) / "tvrename"
+
+
+def cache_key(endpoint, tmdb_id, season=None, lang=None):
+    """Builds the cache key for a TMDb response from (endpoint, id, season, lang)."""
+    return f"{endpoint}|{tmdb_id}|{'' if season is None else season}|{lang or ''}"
+
+
+class MetadataCache:
+    """SQLite-backed store of TMDb responses with TTL expiry and size-bounded LRU eviction.
+
+    Reads commit nothing: the access times they update for the LRU order are kept in
+    memory and written with the next put, or at close(), in the same transaction.
+    """
+
+    def __init__(self, cache_dir=None, ttl_hours=DEFAULT_TTL_HOURS, airing_ttl_hours=DEFAULT_AIRING_TTL_HOURS,
+                 max_size_mb=DEFAULT_MAX_SIZE_MB, refresh=False):
+        self.cache_dir = Path(cache_dir) if cache_dir else default_cache_dir()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl_hours * 3600
+        self.airing_ttl = airing_ttl_hours * 3600
+        self.max_size = max_size_mb * 1024 * 1024
+        self.refresh = refresh
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self._accessed = {}  # key: access time not written yet
+        self._total_size = None  # Bytes of all bodies, summed once on the first put
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.cache_dir / "metadata.sqlite3"), check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, body TEXT NOT NULL, size INTEGER NOT NULL,"
+            " etag TEXT, last_modified TEXT, airing INTEGER NOT NULL,"
+            " fetched_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._db.commit()
+
+    def ttl_for(self, airing):
+        """Returns the TTL in seconds for a response, shorter for shows that are still airing."""
+        return self.airing_ttl if airing else self.ttl
+
+    def get(self, key):
+        """Returns (data, fresh, etag, last_modified) for a cached response, or None.
+
+        Stale entries are still returned so the caller can revalidate them with the
+        stored ETag/Last-Modified. With refresh enabled nothing is read from the cache.
+        """
+        if self.refresh:
+            return None
+        with self._lock:
+            row = self._db.execute(
+                "SELECT body, etag, last_modified, airing, fetched_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            self._accessed[key] = now
+        body, etag, last_modified, airing, fetched_at = row
+        return json.loads(body), fetched_at + self.ttl_for(airing) > now, etag, last_modified
+
+    def get_fresh(self, key):
+        """Returns cached data that has not expired yet, or None, counting cache hits and misses."""
+        cached = self.get(key)
+        if cached and cached[1]:
+            self.hits += 1
+            return cached[0]
+        self.misses += 1
+        return None
+
+    def put(self, key, data, airing=False, etag=None, last_modified=None):
+        """Stores a response and evicts the least recently used entries past the size limit."""
+        body = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+        now = time.time()
+        with self._lock:
+            if self._total_size is None:
+                self._total_size = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            replaced = self._db.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, body, size, etag, last_modified, airing, fetched_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, body, len(body), etag, last_modified, int(airing), now, now),
+            )
+            self._accessed.pop(key, None)
+            self._total_size += len(body) - (replaced[0] if replaced else 0)
+            self._write_accessed()
+            if self._total_size > self.max_size:
+                self._evict()
+            self._db.commit()
+
+    def renew(self, key, airing=False):
+        """Extends the expiry of an entry the server confirmed unchanged (HTTP 304)."""
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "UPDATE responses SET airing = ?, fetched_at = ?, accessed_at = ? WHERE key = ?",
+                (int(airing), now, now, key),
+            )
+            self._accessed.pop(key, None)
+            self._db.commit()
+
+    def _write_accessed(self):
+        """Writes the pending access times into the current transaction."""
+        if self._accessed:
+            self._db.executemany("UPDATE responses SET accessed_at = ? WHERE key = ?", [(now, key) for key, now in self._accessed.items()])
+            self._accessed.clear()
+
+    def _evict(self):
+        """Deletes least recently used entries until the cache fits in max_size."""
+        for key, size in self._db.execute("SELECT key, size FROM responses ORDER BY accessed_at").fetchall():
+            if self._total_size <= self.max_size:
+                break
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._total_size -= size
+
+    def close(self):
+        with self._lock:
+            if self._db is None:
+                return
+            self._write_accessed()
+            self._db.commit()
+            self._db.close()
+            self._db = None
@@ -1,19 +1,45 @@
 # tvrename/config.py
 import configparser
+from collections import namedtuple
 from pathlib import Path
 
+NUMBERING_MODES = ["season", "absolute", "auto"]
+
+# episode_shift: subtracted from TMDb episode numbers in season mode; in absolute and auto
+# mode from the absolute numbers only, seasons are then shifted by season_shifts alone
+# season_shifts: ((season, shift), ...) replacing the season shift for single seasons
+# numbering: how bare episode numbers are read, "season" (per season), "absolute"
+# (counted across all regular seasons) or "auto" (per season, else absolute)
+ShiftConfig = namedtuple("ShiftConfig", ["episode_shift", "season_shifts", "numbering"], defaults=[0, (), "season"])
+
+
 def load_config(config_path):
     """Loads the configuration from the specified path."""
     episode_shift = 0
+    season_shifts = ()
+    numbering = "season"
     if config_path.exists() and not config_path.is_dir():
         print("Configuration file found. Loading values...")
         config = configparser.ConfigParser()
         config.read(config_path)
-        episode_shift = int(config["ShiftConfig"].get("episode_shift", 0))
+        if config.has_section("ShiftConfig"):
+            episode_shift = int(config["ShiftConfig"].get("episode_shift", 0))
+            numbering = config["ShiftConfig"].get("numbering", "season").strip().lower()
+        if numbering not in NUMBERING_MODES:
+            raise Exception(f"Unknown numbering \"{numbering}\" in {config_path}, use one of: {', '.join(NUMBERING_MODES)}")
+        if config.has_section("SeasonShift"):
+            try:
+                season_shifts = tuple(sorted((int(season), int(shift)) for season, shift in config["SeasonShift"].items()))
+            except ValueError:
+                raise Exception(f"[SeasonShift] in {config_path} needs lines like \"2 = 12\" (season = shift)")
         print(f"Episode shift is set to {episode_shift}")
+        if season_shifts:
+            print(f"Season shifts: {', '.join(f'S{season:02d} {shift:+d}' for season, shift in season_shifts)}")
+        if numbering != "season":
+            print(f"Episode numbering: {numbering}")
     else:
         if config_path.is_dir():
             print(".config is a directory, skipping configuration load.")
         else:
             print("No configuration file found. Proceeding without shift.")
-    return episode_shift
+    return ShiftConfig(episode_shift, season_shifts, numbering)
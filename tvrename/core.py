@@ -1,16 +1,23 @@
 # tvrename/core.py
 import os
-import requests
-import re
+from functools import partial
 from pathlib import Path
-from .utils import sanitize_filename, apply_truncation, get_full_extension, normalize_filename # Relative import
-from colorama import init, Fore, Style
+from .utils import get_full_extension, sibling_stem, VIDEO_EXTENSIONS # Relative import
+from .matcher import EpisodeMatcher
+from .episodes import EpisodeTable, episodes_from_season
+from .naming import EpisodeNamer
+from .cache import cache_key
+from .tmdb import is_airing, TMDbRequestError
+from .fileops import copy_file, resume_copy, format_size, format_throughput, InodeIndex
+from .executor import DirectoryMaker
+from .identity import ContentChecker, IDENTICAL, DIFFERENT
+from .plan import PlanEntry, MOVING_ACTIONS, resolve_plan, execution_steps
 
 # Regular colors
 yellow = "\033[33m"
 red = "\033[31m"
 green = "\033[32m"
-cyan = Fore.CYAN
+cyan = "\033[36m"
 
 # Bold colors
 yellow_bold = "\033[1;33m"
@@ -23,268 +30,439 @@ light_blue = "\033[94m"
 # Reset
 reset = "\033[0m"
 
+# Actions whose existing targets are compared with their source before being skipped
+CONTENT_ACTIONS = ("copy", "hardlink")
 
-def fetch_series_details(query, api_key, lang="ja-JP"):
-    """Fetches series details from TMDb."""
+# TMDb accepts at most 20 append_to_response entries per request
+APPEND_TO_RESPONSE_LIMIT = 20
+
+
+def fetch_series_details(query, client, lang="ja-JP"):
+    """Fetches series details from TMDb, or from the client's metadata bundle without any request."""
+    if client.bundle is not None:
+        return client.bundle.fetch_details(query, lang)
     if query.isdigit():
-        url = f"https://api.themoviedb.org/3/tv/{query}?api_key={api_key}&include_adult=true&language={lang}"
+        path, params = f"/tv/{query}", {}
+        key = cache_key("tv", query, lang=lang)
     else:
-        url = f"https://api.themoviedb.org/3/search/tv?query={query}&api_key={api_key}&include_adult=true&language={lang}"
-    response = requests.get(url)
-    if response.status_code == 200:
-        data = response.json()
-        if query.isdigit():  # If searching by ID
-            if not data.get("id"):  # Check if 'id' exists in the response
-                raise Exception(f"No series found with ID: {query}")
-            return data
+        path, params = "/search/tv", {"query": query}
+        key = cache_key("search", query, lang=lang)
+    try:
+        data = client.get(path, {**params, "include_adult": "true", "language": lang}, key)
+    except TMDbRequestError as e:
+        raise Exception(f" =Failure= to fetch data from TMDb: {e.status_code} - {e.text}")
+    if query.isdigit():  # If searching by ID
+        if not data.get("id"):  # Check if 'id' exists in the response
+            raise Exception(f"No series found with ID: {query}")
+        return data
+    else:
+        if "results" in data and data["results"]:
+            return data["results"][0]
+        else: # Raise an Exception if no results are found
+            raise Exception(f" =Failure= No series found matching query: {query}")
+
+
+def _fetch_appended_seasons(client, tmdb_id, season_numbers, lang):
+    """Fetches the series details with the given seasons attached through append_to_response.
+
+    Returns the details with the season/N entries removed, and {season_number: season_data}.
+    """
+    params = {"include_adult": "true", "language": lang}
+    if season_numbers:
+        params["append_to_response"] = ",".join(f"season/{n}" for n in season_numbers)
+    details = client.get(f"/tv/{tmdb_id}", params)
+    seasons = {}
+    for season_number in season_numbers:
+        season_data = details.pop(f"season/{season_number}", None)
+        if season_data is not None:
+            seasons[season_number] = season_data
+    return details, seasons
+
+
+def season_episode_counts(details):
+    """Returns {season number: episode count} from the seasons list of the series details."""
+    return {s["season_number"]: s.get("episode_count") for s in details.get("seasons", [])}
+
+
+def fetch_series_seasons(tmdb_id, client, lang="ja-JP", season=None):
+    """Fetches series details and season data from TMDb with as few requests as possible.
+
+    Seasons ride on the series details call in batches of APPEND_TO_RESPONSE_LIMIT, the
+    first batch (a guess of seasons 0-19, or just `season`) on the very first request.
+    The remaining batches are fetched concurrently on the client's workers. Each season
+    response is cached as is and then reduced to Episode records straight away.
+    Returns (details, episode_table, failed) where failed maps season numbers to the
+    HTTP status of the request that should have returned them. With a metadata bundle
+    on the client, everything comes from the bundle.
+    """
+    if client.bundle is not None:
+        return client.bundle.fetch_seasons(tmdb_id, lang, season)
+    cache = client.cache
+    details_key = cache_key("tv", tmdb_id, lang=lang)
+    seasons = {}
+    failed = {}
+
+    details = cache.get_fresh(details_key) if cache else None
+    fetched = {}
+    if details is None:
+        guess = [season] if season is not None else list(range(APPEND_TO_RESPONSE_LIMIT))
+        try:
+            details, fetched = _fetch_appended_seasons(client, tmdb_id, guess, lang)
+        except TMDbRequestError as e:
+            raise Exception(f" =Failure= to fetch data from TMDb: {e.status_code} - {e.text}")
+        if not details.get("id"):
+            raise Exception(f"No series found with ID: {tmdb_id}")
+        if cache:
+            cache.put(details_key, details, is_airing(details))
+    airing = is_airing(details)
+
+    if season is not None:
+        season_numbers = [season]
+    else:
+        season_numbers = sorted({s["season_number"] for s in details.get("seasons", [])})
+
+    missing = []
+    for season_number in season_numbers:
+        if season_number in fetched:
+            if cache:
+                cache.put(cache_key("season", tmdb_id, season_number, lang), fetched[season_number], airing)
+            seasons[season_number] = episodes_from_season(season_number, fetched[season_number])
+            continue
+        season_data = cache.get_fresh(cache_key("season", tmdb_id, season_number, lang)) if cache else None
+        if season_data is not None:
+            seasons[season_number] = episodes_from_season(season_number, season_data)
         else:
-            if "results" in data and data["results"]:
-                return data["results"][0]
-            else: # Raise an Exception if no results are found
-                raise Exception(f" =Failure= No series found matching query: {query}")
+            missing.append(season_number)
+    del fetched  # Speculative seasons that were not asked for go too
+
+    def fetch_batch(batch):
+        try:
+            return batch, _fetch_appended_seasons(client, tmdb_id, batch, lang)[1], None
+        except TMDbRequestError as e:
+            return batch, {}, e
+
+    batches = [missing[i:i + APPEND_TO_RESPONSE_LIMIT] for i in range(0, len(missing), APPEND_TO_RESPONSE_LIMIT)]
+    for batch, batch_seasons, error in client.map(fetch_batch, batches):
+        if error:
+            failed.update((season_number, error.status_code) for season_number in batch)
+            continue
+        for season_number, season_data in batch_seasons.items():
+            if cache:
+                cache.put(cache_key("season", tmdb_id, season_number, lang), season_data, airing)
+            seasons[season_number] = episodes_from_season(season_number, season_data)
+
+    for season_number in season_numbers:
+        if season_number not in seasons and season_number not in failed:
+            failed[season_number] = 404  # TMDb leaves out seasons that do not exist
+
+    return details, EpisodeTable(seasons, season_episode_counts(details)), failed
+
+
+def plan_file(file, series_name, matcher, action, output_path, format_string=None, sources=(), parsed=None, matches=None, namer=None):
+    """Matches one file and returns its PlanEntry, or None if no episode matches.
+
+    For a rename, candidates whose target already exists are passed over in favour of the
+    next match, unless the existing file is another source that a rename will move away.
+    For a copy or hardlink the first candidate is kept even when its target exists, as
+    "exists", so the existing file is compared with the source (identical, partial copy to
+    resume or conflict) instead of the file being copied again as another episode. `matches`
+    replaces the matcher's candidates, e.g. with a title match. Pass the run's EpisodeNamer
+    as `namer` so each episode's name is rendered once.
+    """
+    if namer is None:
+        namer = EpisodeNamer(format_string, series_name, matcher)
+    skipped = None
+    for match in matcher.match(file.name, parsed) if matches is None else matches:
+        new_name = namer.name(match)
+        new_file_name = f"{new_name}{get_full_extension(file.name)}"
+        final_output_path = (output_path if output_path else file.parent) / new_file_name
+
+        entry = PlanEntry(
+            str(file), str(final_output_path), action, "ok", match.pattern,
+            match.season_number, match.episode_number, match.local_episode_number, match.range_end, None,
+        )
+        moved_away = action in MOVING_ACTIONS and final_output_path in sources and final_output_path != file
+        if not final_output_path.exists() or moved_away:
+            return entry
+        if action in CONTENT_ACTIONS:
+            return entry._replace(status="exists")
+        skipped = skipped or entry._replace(status="exists")
+    return skipped
+
+
+def group_siblings(files):
+    """Groups files by folder and sibling stem, e.g. a video with its .ja.ass and .en.srt tracks.
+
+    Returns {representative: [members]} in path order. The representative is the group's
+    first video, or its first file when it holds no video, and is one of its members.
+    """
+    groups = {}
+    for file in sorted(files):
+        folder, name = os.path.split(str(file))
+        groups.setdefault((folder, sibling_stem(name)), []).append(file)
+    siblings = {}
+    for members in groups.values():
+        if len(members) == 1:
+            siblings[members[0]] = members
+            continue
+        videos = [file for file in members if file.suffix.lower() in VIDEO_EXTENSIONS]
+        siblings[videos[0] if videos else members[0]] = members
+    return siblings
+
+
+def sibling_entries(entry, file, members):
+    """Applies the plan entry of a group's representative to all its members.
+
+    Every member goes next to the representative's target under the same name, keeping
+    its own full extension; whether each target is free is left to resolve_plan.
+    """
+    if len(members) == 1:
+        return {file: entry}
+    target = Path(entry.target)
+    new_name = target.name[:len(target.name) - len(get_full_extension(file.name))]
+    entries = {}
+    for member in members:
+        if member == file:
+            entries[member] = entry
+            continue
+        member_target = target.with_name(f"{new_name}{get_full_extension(member.name)}")
+        entries[member] = entry._replace(source=str(member), target=str(member_target), status="ok")
+    return entries
+
+
+def build_plan(files, series_name, matcher, action, output_path, format_string=None, parsed=None, title_matcher=None, jobs=1):
+    """Matches every file once and returns the resolved plan.
+
+    Files are planned in path order so the same input always gives the same plan.
+    Siblings sharing a stem (a video and its subtitles) are matched once, through their
+    video, and renamed together. `parsed` optionally maps files to their parse_filename
+    result, e.g. parsed while scanning. With a TitleMatcher, groups no episode number
+    matched are then matched by title in one batch, against the episodes no other file
+    took. With `jobs` other than 1, large file lists are matched on a process pool
+    (0: one process per CPU), with the same result.
+    """
+    sources = set(files)
+    parsed = parsed or {}
+    namer = EpisodeNamer(format_string, series_name, matcher)
+    siblings = group_siblings(files)
+    entries = {}
+    unmatched = []
+    files = list(siblings)
+    if jobs != 1:
+        from .jobs import job_count, plan_in_processes
+        jobs = job_count(jobs, len(files))
+    if jobs > 1:
+        planned = plan_in_processes(files, series_name, matcher, action, output_path, format_string, sources, parsed, jobs)
     else:
-        raise Exception(f" =Failure= to fetch data from TMDb: {response.status_code} - {response.text}")
+        planned = (plan_file(file, series_name, matcher, action, output_path, format_string, sources, parsed.get(file), namer=namer) for file in files)
+    for file, entry in zip(files, planned):
+        if entry:
+            entries.update(sibling_entries(entry, file, siblings[file]))
+        else:
+            unmatched.append(file)
 
+    if title_matcher and unmatched:
+        taken = {(entry.season, entry.episode) for entry in entries.values()}
+        for file, match in title_matcher.match_files(unmatched, taken).items():
+            entry = plan_file(file, series_name, matcher, action, output_path, format_string, sources, matches=[match], namer=namer)
+            if entry:
+                entries.update(sibling_entries(entry, file, siblings[file]))
+    return resolve_plan([entries[file] for file in sorted(entries)])
 
-def process_file(file, series_name, season_data_cache, episode_shift, args, output_path):
-    """Processes a single file, attempting to rename it based on TMDb data."""
-    file_processed = False
-    for season_number, season_data in season_data_cache.items():
-        episodes = season_data.get("episodes", [])
-        for episode in episodes:
-            tmdb_episode_number = episode["episode_number"]
-            local_episode_number = tmdb_episode_number - episode_shift
 
-            # Allow zero-based local numbering (e.g. file uses 00 for episode 1)
-            if local_episode_number < 0:
-                continue
+def _display_names(file, final_output_path):
+    """Returns the source and target as printed: bare names when both are in one folder."""
+    output_parent = str(Path(final_output_path).parent)
+    file_parent = str(Path(file).parent)
+
+    if output_parent == file_parent:
+        destin_file_name = str(Path(final_output_path).relative_to(output_parent))
+        source_file_name = str(Path(file).relative_to(output_parent))
+    else:
+        destin_file_name = final_output_path
+        source_file_name = file
+    return source_file_name, destin_file_name
+
+
+def _existing_target(file, final_output_path, action, checker, stats, source_file_name, destin_file_name):
+    """Handles a copy or hardlink whose target exists by comparing contents; returns like _apply_step.
+
+    Identical targets are skipped, partial copies are resumed (or copied again when the
+    result does not match) or replaced by the hardlink, other targets are conflicts.
+    """
+    try:
+        outcome = checker.compare(file, final_output_path)
+    except OSError as e:
+        return [f"{red_bold}[SKIPPING]{reset} {source_file_name} {red_bold}->{reset} {destin_file_name} {red_bold}(Target file already exists, cannot compare: {e}){reset}"], 0
+
+    if outcome == IDENTICAL:
+        if stats:
+            stats.count("identical")
+        return [f"{yellow}[IDENTICAL]{reset} {source_file_name} {yellow}->{reset} {destin_file_name} (Target already has the same content)"], 0
+    if outcome == DIFFERENT:
+        if stats:
+            stats.count("conflicts")
+        return [f"{red_bold}[CONFLICT]{reset} {source_file_name} {red_bold}->{reset} {destin_file_name} {red_bold}(Target exists with different content){reset}"], 0
+
+    if stats:
+        stats.count("resumed")
+    if action == "hardlink":
+        temporary = final_output_path.with_name(f".{final_output_path.name}.tvrename-link")
+        os.link(file, temporary)
+        os.replace(temporary, final_output_path)
+        return [f"{light_blue}[REPLACED]{reset} {source_file_name} {light_blue}->{reset} {destin_file_name} (Partial copy replaced by a hardlink)"], 1
+
+    size, seconds, method = resume_copy(file, final_output_path)
+    label, note = "RESUMED", f"{format_size(size)} appended"
+    if not checker.matches(file, final_output_path):
+        size, seconds, method = copy_file(file, final_output_path)
+        label, note = "REPLACED", "resumed copy did not match, copied again"
+    if stats:
+        stats.count("bytes_copied", size)
+        stats.count("copy_seconds", seconds)
+    return [f"{green_bold}[{label}]{reset} {source_file_name} {green_bold}->{reset} {destin_file_name} ({note}, {format_throughput(size, seconds)}, {method})"], 1
+
 
-            episode_title = sanitize_filename(episode["name"])
+def _apply_step(step, entry, file, rename_hardlink, inode_index, directories, stats, checker=None):
+    """Applies one execution step and returns (printed lines, 1 if the file was processed else 0)."""
+    final_output_path = Path(entry.target)
+    action = entry.action
+    source_file_name, destin_file_name = _display_names(Path(entry.source), final_output_path)
 
-            if not args.format:
-                new_name = f"{series_name} - S{season_number:02d}E{tmdb_episode_number:02d} - {episode_title}"
+    if step == "stash":
+        # Part of a swap cycle: park the source under a temporary name until its target is free
+        if action != "dry-run":
+            file.rename(file.with_name(f".{Path(entry.source).name}.tvrename-swap"))
+        return [f"{cyan}[SWAP]{reset} {source_file_name} is renamed last to break a rename cycle"], 0
+
+    if step == "skip" and entry.status == "collision":
+        conflict_name = _display_names(Path(entry.conflict), final_output_path)[0]
+        prefix = f"{yellow}[DRY-RUN]{reset} " if action == "dry-run" else ""
+        return [f"{prefix}{red_bold}[SKIPPING]{reset} {source_file_name} {red_bold}->{reset} {destin_file_name} {red_bold}(Target already taken by {conflict_name}){reset}"], 0
+
+    if action in CONTENT_ACTIONS and checker and (step == "apply" or entry.status == "exists") and final_output_path.exists():
+        return _existing_target(file, final_output_path, action, checker, stats, source_file_name, destin_file_name)
+
+    if step == "skip" or (action != "dry-run" and final_output_path.exists()):
+        if action == "dry-run":
+            return [f"{yellow}[DRY-RUN]{reset} {red_bold}[SKIPPING]{reset} {source_file_name} {yellow}->{reset} {destin_file_name} {red_bold}(Target file already exists){reset}"], 0
+        return [f"{red_bold}[SKIPPING]{reset} {source_file_name} {red_bold}->{reset} {destin_file_name} {red_bold}(Target file already exists){reset}"], 0
+
+    lines = []
+    if action == "dry-run":
+        lines.append(f"{yellow_bold}[DRY-RUN]{reset} {green}[RENAME]{reset} {source_file_name} {yellow_bold}->{reset} {destin_file_name}")
+    elif action == "rename":
+        directories.make(final_output_path.parent)
+        file.rename(final_output_path)
+        lines.append(f"{green_bold}[RENAMED]{reset} {source_file_name} {green_bold}->{reset} {destin_file_name}")
+    elif action == "copy":
+        directories.make(final_output_path.parent)
+        size, seconds, method = copy_file(file, final_output_path)
+        if stats:
+            stats.count("bytes_copied", size)
+            stats.count("copy_seconds", seconds)
+        lines.append(f"{green_bold}[COPIED]{reset} {source_file_name} {green_bold}->{reset} {destin_file_name} ({format_size(size)}, {format_throughput(size, seconds)}, {method})")
+    elif action == "hardlink":  # NEW ACTION
+        directories.make(final_output_path.parent)
+        source_stat = os.stat(file)
+        if final_output_path.exists():
+            # Check if destination file has same inode as source
+            if source_stat.st_ino == os.stat(final_output_path).st_ino:
+                if rename_hardlink:
+                    # Remove existing hardlink and create new one with new name
+                    final_output_path.unlink()
+                    os.link(file, final_output_path)
+                    lines.append(f"{green_bold}[RENAMED HARDLINK]{reset} {source_file_name} {green_bold}->{reset} {destin_file_name}")
+                else:
+                    # Skip if rename_hardlink is false
+                    lines.append(f"{yellow}[SKIPPED]{reset} Hardlink already exists: {final_output_path}")
+            else:
+                lines.append(f"{red}[ERROR]{reset} File exists with different inode: {final_output_path}")
+        else:
+            # Check for files with same inode in destination directory
+            same_inode_files = inode_index.links(final_output_path.parent, source_stat)
+
+            if same_inode_files:
+                if rename_hardlink:
+                    # Remove old hardlinks and create new one
+                    for old_link in same_inode_files:
+                        old_link.unlink()
+                        inode_index.remove(old_link, source_stat)
+                        lines.append(f"{cyan}[REMOVED OLD HARDLINK]{reset} {old_link}")
+                    os.link(file, final_output_path)
+                    inode_index.add(final_output_path, source_stat)
+                    lines.append(f"{light_blue}[HARDLINKED]{reset} {source_file_name} {light_blue}->{reset} {destin_file_name}")
+                else:
+                    # Keep existing hardlink
+                    lines.append(f"{yellow}[SKIPPED]{reset} Keeping existing hardlink: {same_inode_files[0]}")
             else:
-                new_name = args.format
-                new_name = apply_truncation(new_name, "n", series_name)
-                new_name = apply_truncation(new_name, "t", episode_title)
-                new_name = new_name.replace("{s00e00}", f"S{season_number:02d}E{tmdb_episode_number:02d}")
-
-            multi_episode_patterns = [
-                rf"\bS{season_number:02d}E{local_episode_number:02d}-(\d{{2,3}})\b",
-                rf"\b{local_episode_number:02d}-(\d{{2,3}})\b",
-            ]
-
-            multi_episode_match = None
-            for pattern in multi_episode_patterns:
-                multi_episode_match = re.search(pattern, normalize_filename(file.name), re.IGNORECASE)
-                if multi_episode_match:
-                    break
-
-            if multi_episode_match:
-                range_end = int(multi_episode_match.group(1))
-                if range_end >= local_episode_number:
-                    episode_titles = [
-                        sanitize_filename(ep["name"])
-                        for ep in episodes
-                        if local_episode_number <= ep["episode_number"] <= range_end
-                    ]
-                    if episode_titles:
-                        range_str = f"S{season_number:02d}E{local_episode_number:02d}-{range_end:02d}"
-                        title_str = " ／ ".join(episode_titles)
-                        if not args.format:
-                            new_name = f"{series_name} - {range_str} - {title_str}"
-                        else:
-                            new_name = args.format
-                            new_name = apply_truncation(new_name, "n", series_name)
-                            new_name = apply_truncation(new_name, "t", title_str)
-                            new_name = new_name.replace("{s00e00}", range_str)
-
-            patterns = [
-                rf"\bS{season_number:02d}E{local_episode_number:02d}\b",
-                rf"\bS{season_number:02d}EP{local_episode_number:02d}\b",
-                rf"\b0?{season_number}x{local_episode_number:02d}\b",
-                rf"\b{season_number}xSpecial {local_episode_number}\b",
-                rf"(-| |\[|.)S{season_number:02d}E{local_episode_number:02d}v\d{{1}}(\]| |-|\[|\.)",
-            ]
-
-            next_patterns = [
-                # rf"\[{local_episode_number:02d}\]",
-                rf"^0?{local_episode_number}(\.| )", # Matches at the beginning of the file name
-                rf"(-| |\[|\()0?{local_episode_number}(\]| |-|\[|\.|\))", 
-                rf"(-| |\[){local_episode_number:03d}(\]| |-|\[|\.)",
-                # rf" -{local_episode_number:02d}-",
-                # rf"- {local_episode_number:02d} ",
-                # rf" {local_episode_number:02d}\[", 
-                # rf"(-| ){local_episode_number:02d}( |\[)",
-                # rf" {local_episode_number:02d}[.| ]", 
-                rf"_0?{local_episode_number}_", # Matches with or without leading zero
-                rf"(-| |\[|_){local_episode_number:02d}v\d{{1}}(\(|\]| |-|\[|\.|_)", # Matches with or without version number
-                rf"第0?{local_episode_number}[弾話章话巻怪幕節夜回]",
-                rf" EP0?{local_episode_number} ",
-                rf"( |_)Ep0?{local_episode_number}(_| |\.)",
-                rf" E0?{local_episode_number} ",
-                rf"\.EP{local_episode_number:02d}\.", # Matches with dots
-                rf"Vol\.0?{local_episode_number}",
-                rf"Epilogue.0?{local_episode_number}",
-                rf"＃0?{local_episode_number}", # Full-width hash
-                rf"Episode 0?{local_episode_number}",
-                rf" #0?{local_episode_number}",
-                rf"(-| |\[|)#({local_episode_number}|{local_episode_number:02d}) ",
-                rf"SP{local_episode_number:02d}",
-                rf"\[{local_episode_number:02d} ?(END|FIN)\]",
-                rf"\[{local_episode_number:02d}_?(END|FIN)\]",  # Matches with or without space before END/FIN
-                rf"Part\.0?{local_episode_number}",
-                # rf"\[(OAD|OVA) ?{local_episode_number:02d}\]",  # Matches with or without space before episode number
-            ]
-            
-            for pattern in patterns:
-                if re.search(pattern, normalize_filename(file.name), re.IGNORECASE):
-                    # print(f"{pattern} found in {file.name}")
-                    new_file_name = f"{new_name}{get_full_extension(file.name)}"
-                    final_output_path = (output_path if output_path else file.parent) / new_file_name
-
-                    output_parent = str(Path(final_output_path).parent)
-                    file_parent = str(Path(file).parent)
-
-                    if output_parent == file_parent:
-                        destin_file_name = str(Path(final_output_path).relative_to(output_parent))
-                        source_file_name = str(Path(file).relative_to(output_parent))
-                    else:
-                        destin_file_name = final_output_path
-                        source_file_name = file
-
-                    if final_output_path.exists():
-                        if args.action == "dry-run":
-                            print(f"{Fore.YELLOW}[DRY-RUN]{Style.RESET_ALL} {red_bold}[SKIPPING]{reset} {source_file_name} {Fore.YELLOW}->{Style.RESET_ALL} {destin_file_name} {red_bold}(Target file already exists){reset}")
-                        else:
-                            print(f"{red_bold}[SKIPPING]{reset} {source_file_name} {red_bold}->{reset} {destin_file_name} {red_bold}(Target file already exists){reset}")
-                        break
-
-                    if args.action == "dry-run":
-                        print(f"{yellow_bold}[DRY-RUN]{reset} {Fore.GREEN}[RENAME]{Style.RESET_ALL} {source_file_name} {yellow_bold}->{reset} {destin_file_name}")
-                    elif args.action == "rename":
-                        final_output_path.parent.mkdir(parents=True, exist_ok=True)
-                        file.rename(final_output_path)
-                        print(f"{green_bold}[RENAMED]{reset} {source_file_name} {green_bold}->{reset} {destin_file_name}")
-                    elif args.action == "copy":
-                        final_output_path.parent.mkdir(parents=True, exist_ok=True)
-                        final_output_path.write_bytes(file.read_bytes())
-                        print(f"{green_bold}[COPIED]{reset} {source_file_name} {green_bold}->{reset} {destin_file_name}")
-                    elif args.action == "hardlink":  # NEW ACTION
-                        final_output_path.parent.mkdir(parents=True, exist_ok=True)
-                        if final_output_path.exists():
-                            # Check if destination file has same inode as source
-                            if os.stat(file).st_ino == os.stat(final_output_path).st_ino:
-                                if args.rename_hardlink:
-                                    # Remove existing hardlink and create new one with new name
-                                    final_output_path.unlink()
-                                    os.link(file, final_output_path)
-                                    print(f"{green_bold}[RENAMED HARDLINK]{reset} {source_file_name} {green_bold}->{reset} {destin_file_name}")
-                                else:
-                                    # Skip if rename_hardlink is false
-                                    print(f"{yellow}[SKIPPED]{reset} Hardlink already exists: {final_output_path}")
-                            else:
-                                print(f"{red}[ERROR]{reset} File exists with different inode: {final_output_path}")
-                        else:
-                            # Check for files with same inode in destination directory
-                            same_inode_files = [f for f in final_output_path.parent.iterdir() 
-                                              if f.is_file() and os.stat(f).st_ino == os.stat(file).st_ino]
-                            
-                            if same_inode_files:
-                                if args.rename_hardlink:
-                                    # Remove old hardlinks and create new one
-                                    for old_link in same_inode_files:
-                                        old_link.unlink()
-                                        print(f"{cyan}[REMOVED OLD HARDLINK]{reset} {old_link}")
-                                    os.link(file, final_output_path)
-                                    print(f"{light_blue}[HARDLINKED]{reset} {source_file_name} {light_blue}->{reset} {destin_file_name}")
-                                else:
-                                    # Keep existing hardlink
-                                    print(f"{yellow}[SKIPPED]{reset} Keeping existing hardlink: {same_inode_files[0]}")
-                            else:
-                                # Create new hardlink if no existing ones found
-                                os.link(file, final_output_path)
-                                print(f"{light_blue}[HARDLINKED]{reset} {source_file_name} {light_blue}->{reset} {destin_file_name}")
-                    file_processed = True
-                    break
-
-            if file_processed:
-                break
-
-            if re.search(rf"S\d{{2}}E\d{{2,3}}", file.name, re.IGNORECASE) or \
-                re.search(rf"\b\d{{2}}x\d{{2,3}}\b", file.name, re.IGNORECASE) or \
-                re.search(rf"\d{{1,2}}xSpecial \d{{1,3}}", file.name, re.IGNORECASE):
+                # Create new hardlink if no existing ones found
+                os.link(file, final_output_path)
+                inode_index.add(final_output_path, source_stat)
+                lines.append(f"{light_blue}[HARDLINKED]{reset} {source_file_name} {light_blue}->{reset} {destin_file_name}")
+    return lines, 1
+
+
+def execute_plan(entries, rename_hardlink=False, inode_index=None, stats=None, executor=None):
+    """Applies a plan and returns the number of files processed.
+
+    Targets are checked again right before each action since the plan may be applied
+    long after, or on another machine than, it was made. Bytes copied go to `stats`.
+    With a parallel ActionExecutor the actions run on its thread pool, a rename waiting
+    for the rename that frees its target, and their output is printed in plan order.
+    Existing copy and hardlink targets are compared with the executor's ContentChecker.
+    """
+    if inode_index is None:
+        inode_index = InodeIndex()
+    directories = executor.directories if executor else DirectoryMaker()
+    checker = executor.checker if executor and executor.checker else ContentChecker()
+    parallel = executor is not None and executor.parallel
+    processed = 0
+    stashed = {}
+    last_task = {}  # source path: Future of the last step moving it
+    results = []
+    for step, entry in execution_steps(entries):
+        file = Path(stashed.get(entry.source, entry.source))
+        if step == "stash":
+            stashed[entry.source] = str(file.with_name(f".{file.name}.tvrename-swap"))
+        arguments = (step, entry, file, rename_hardlink, inode_index, directories, stats, checker)
+        compares = entry.action in CONTENT_ACTIONS and entry.status == "exists"
+        if not parallel or (step == "skip" and not compares) or entry.action == "dry-run":
+            result = _apply_step(*arguments)
+            if not parallel:
+                lines, done = result
+                for line in lines:
+                    print(line)
+                processed += done
                 continue
+            results.append(result)
+            continue
+        after = [last_task[source] for source in (entry.source, entry.target) if source in last_task]
+        kind = "copy" if entry.action == "copy" else "metadata"
+        future = executor.submit(partial(_apply_step, *arguments), Path(entry.target).parent, kind, after)
+        if entry.action in MOVING_ACTIONS:
+            last_task[entry.source] = future
+        results.append(future)
+
+    for result in results:
+        lines, done = result if isinstance(result, tuple) else result.result()
+        for line in lines:
+            print(line)
+        processed += done
+    return processed
+
+
+def process_file(file, series_name, season_data_cache, episode_shift, args, output_path, matcher=None, inode_index=None):
+    """Processes a single file, attempting to rename it based on TMDb data.
+
+    season_data_cache is an EpisodeTable or the raw season responses keyed by season number.
 
-            for next_pattern in next_patterns:
-                if re.search(next_pattern, normalize_filename(file.name), re.IGNORECASE):
-                    # print(f"{next_pattern} found in {file.name}")
-                    new_file_name = f"{new_name}{get_full_extension(file.name)}"
-                    final_output_path = (output_path if output_path else file.parent) / new_file_name
-
-                    output_parent = str(Path(final_output_path).parent)
-                    file_parent = str(Path(file).parent)
-
-                    if output_parent == file_parent:
-                        destin_file_name = str(Path(final_output_path).relative_to(output_parent))
-                        source_file_name = str(Path(file).relative_to(output_parent))
-                    else:
-                        destin_file_name = final_output_path
-                        source_file_name = file
-
-                    if final_output_path.exists():
-                        if args.action == "dry-run":
-                            print(f"{Fore.YELLOW}[DRY-RUN]{Style.RESET_ALL} {red_bold}[SKIPPING]{reset} {source_file_name} {Fore.YELLOW}->{Style.RESET_ALL} {destin_file_name} {red_bold}(Target file already exists){reset}")
-                        else:
-                            print(f"{red_bold}[SKIPPING]{reset} {source_file_name} {red_bold}->{reset} {destin_file_name} {red_bold}(Target file already exists){reset}")
-                        break
-
-                    if args.action == "dry-run":
-                        print(f"{yellow_bold}[DRY-RUN]{reset} {Fore.GREEN}[RENAME]{Style.RESET_ALL} {source_file_name} {yellow_bold}->{reset} {destin_file_name}")
-                    elif args.action == "rename":
-                        final_output_path.parent.mkdir(parents=True, exist_ok=True)
-                        file.rename(final_output_path)
-                        print(f"{green_bold}[RENAMED]{reset} {source_file_name} {green_bold}->{reset} {destin_file_name}")
-                    elif args.action == "copy":
-                        final_output_path.parent.mkdir(parents=True, exist_ok=True)
-                        final_output_path.write_bytes(file.read_bytes())
-                        print(f"{green_bold}[COPIED]{reset} {source_file_name} {green_bold}->{reset} {destin_file_name}")
-                    elif args.action == "hardlink":  # NEW ACTION
-                        final_output_path.parent.mkdir(parents=True, exist_ok=True)
-                        if final_output_path.exists():
-                            # Check if destination file has same inode as source
-                            if os.stat(file).st_ino == os.stat(final_output_path).st_ino:
-                                if args.rename_hardlink:
-                                    # Remove existing hardlink and create new one with new name
-                                    final_output_path.unlink()
-                                    os.link(file, final_output_path)
-                                    print(f"{green_bold}[RENAMED HARDLINK]{reset} {source_file_name} {green_bold}->{reset} {destin_file_name}")
-                                else:
-                                    # Skip if rename_hardlink is false
-                                    print(f"{yellow}[SKIPPED]{reset} Hardlink already exists: {final_output_path}")
-                            else:
-                                print(f"{red}[ERROR]{reset} File exists with different inode: {final_output_path}")
-                        else:
-                            # Check for files with same inode in destination directory
-                            same_inode_files = [f for f in final_output_path.parent.iterdir() 
-                                              if f.is_file() and os.stat(f).st_ino == os.stat(file).st_ino]
-                            
-                            if same_inode_files:
-                                if args.rename_hardlink:
-                                    # Remove old hardlinks and create new one
-                                    for old_link in same_inode_files:
-                                        old_link.unlink()
-                                        print(f"{cyan}[REMOVED OLD HARDLINK]{reset} {old_link}")
-                                    os.link(file, final_output_path)
-                                    print(f"{light_blue}[HARDLINKED]{reset} {source_file_name} {light_blue}->{reset} {destin_file_name}")
-                                else:
-                                    # Keep existing hardlink
-                                    print(f"{yellow}[SKIPPED]{reset} Keeping existing hardlink: {same_inode_files[0]}")
-                            else:
-                                # Create new hardlink if no existing ones found
-                                os.link(file, final_output_path)
-                                print(f"{light_blue}[HARDLINKED]{reset} {source_file_name} {light_blue}->{reset} {destin_file_name}")
-                    file_processed = True
-                    break
-
-    return file_processed
\ No newline at end of file
+    Pass a shared EpisodeMatcher and InodeIndex when processing many files so the episode
+    index and the destination directory listings are built once.
+    """
+    if matcher is None:
+        matcher = EpisodeMatcher(season_data_cache, episode_shift)
+    entry = plan_file(file, series_name, matcher, args.action, output_path, args.format)
+    if entry is None:
+        return False
+    return execute_plan([entry], args.rename_hardlink, inode_index) > 0
@@ -0,0 +1,29 @@
+# tvrename/defaults.py
+# Default values of the command line options. Kept free of imports so that parsing the
+# arguments (and --help) does not load the modules that use them.
+
+# Metadata cache (cache.py)
+DEFAULT_TTL_HOURS = 168  # One week for finished shows
+DEFAULT_AIRING_TTL_HOURS = 12  # Shows still airing gain episodes and titles often
+DEFAULT_MAX_SIZE_MB = 256
+
+# TMDb client (tmdb.py)
+DEFAULT_TIMEOUT = 30  # Seconds to wait for TMDb to connect or answer
+DEFAULT_WORKERS = 4  # Concurrent season requests
+DEFAULT_RATE_LIMIT = 40  # Requests per second, TMDb's documented ceiling is around 50
+DEFAULT_MAX_RETRIES = 5
+
+# Library, matching and actions (library.py, jobs.py, executor.py, identity.py, titlematch.py)
+DEFAULT_LIBRARY_WORKERS = 4
+DEFAULT_JOBS = 1
+DEFAULT_IO_WORKERS = 8
+DEFAULT_METADATA_PER_DEVICE = 8  # Concurrent renames and hardlinks on one device, mostly metadata round trips
+DEFAULT_COPIES_PER_DEVICE = 2  # Concurrent copies to one device; one on a spinning disk
+VERIFY_LEVELS = ["size", "sample", "full"]
+DEFAULT_VERIFY = "sample"
+DEFAULT_TITLE_THRESHOLD = 85  # Minimum rapidfuzz WRatio score (0-100) for a title match
+
+# Watch mode (watch.py)
+DEFAULT_SETTLE = 10.0  # Seconds a file's size must stay unchanged before it is processed
+DEFAULT_POLL_INTERVAL = 5.0
+DEFAULT_WATCH_REFRESH_HOURS = 6.0  # How often the metadata of a watched series is refreshed
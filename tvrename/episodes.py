@@ -0,0 +1,79 @@
+# tvrename/episodes.py
+from .utils import sanitize_filename
+
+
+class Episode:
+    """One TMDb episode, reduced to what renaming needs."""
+
+    __slots__ = ("season", "episode", "absolute", "title", "air_date")
+
+    def __init__(self, season, episode, title, air_date="", absolute=None):
+        self.season = season
+        self.episode = episode
+        self.absolute = absolute
+        self.title = title  # Sanitized for file names
+        self.air_date = air_date  # YYYY-MM-DD, empty when unknown
+
+    def __repr__(self):
+        return f"Episode(S{self.season:02d}E{self.episode:02d}, {self.title!r})"
+
+
+def episodes_from_season(season_number, season_data):
+    """Turns a raw TMDb season response into Episode records, in TMDb's order."""
+    return [
+        Episode(season_number, episode["episode_number"], sanitize_filename(episode["name"]), episode.get("air_date") or "")
+        for episode in season_data.get("episodes", [])
+    ]
+
+
+class EpisodeTable:
+    """The episodes of one series, indexed by (season, episode) and by absolute number.
+
+    Built from the season responses as they arrive so that the raw JSON, with its
+    overviews, crews, guest stars and stills, can be dropped right away. Absolute numbers
+    count the regular episodes across seasons in order; specials (season 0) have none.
+    `episode_counts` (season number: episode count, from the series details) stands in
+    for the regular seasons that were not fetched (--season, a failed request), so the
+    absolute numbers do not depend on which seasons a run loaded.
+    """
+
+    __slots__ = ("seasons", "by_number", "by_absolute")
+
+    def __init__(self, seasons, episode_counts=None):
+        self.seasons = {season_number: seasons[season_number] for season_number in sorted(seasons)}
+        self.by_number = {}
+        self.by_absolute = {}
+        for season_number, episodes in self.seasons.items():
+            for episode in episodes:
+                self.by_number.setdefault((season_number, episode.episode), episode)
+        counts = {season_number: count for season_number, count in (episode_counts or {}).items() if season_number > 0}
+        counts.update((season_number, len(episodes)) for season_number, episodes in self.seasons.items() if season_number > 0)
+        absolute = 0
+        for season_number in sorted(counts):
+            episodes = self.seasons.get(season_number)
+            if episodes is None:
+                absolute += counts[season_number] or 0
+                continue
+            for episode in sorted(episodes, key=lambda episode: episode.episode):
+                absolute += 1
+                episode.absolute = absolute
+                self.by_absolute[absolute] = episode
+
+    @classmethod
+    def from_seasons(cls, season_data_cache):
+        """Builds the table from raw TMDb season responses keyed by season number."""
+        return cls({season_number: episodes_from_season(season_number, season_data) for season_number, season_data in season_data_cache.items()})
+
+    def __len__(self):
+        return len(self.by_number)
+
+    def __contains__(self, season_number):
+        return season_number in self.seasons
+
+    def get(self, season_number, episode_number):
+        """Returns the Episode with this season and TMDb episode number, or None."""
+        return self.by_number.get((season_number, episode_number))
+
+    def absolute(self, absolute_number):
+        """Returns the Episode with this absolute number, or None."""
+        return self.by_absolute.get(absolute_number)
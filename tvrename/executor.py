@@ -0,0 +1,124 @@
+# tvrename/executor.py
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .defaults import DEFAULT_IO_WORKERS, DEFAULT_METADATA_PER_DEVICE, DEFAULT_COPIES_PER_DEVICE
+
+
+def _rotational(device):
+    """Returns True if the block device behind a st_dev is a spinning disk (Linux only)."""
+    if not sys.platform.startswith("linux"):
+        return False
+    block = f"/sys/dev/block/{os.major(device)}:{os.minor(device)}"
+    # Partitions keep the queue settings on their parent disk
+    for queue in (f"{block}/queue/rotational", f"{block}/../queue/rotational"):
+        try:
+            with open(queue) as f:
+                return f.read().strip() == "1"
+        except OSError:
+            continue
+    return False
+
+
+class DirectoryMaker:
+    """Creates each destination directory once per run instead of once per file."""
+
+    def __init__(self):
+        self.created = set()
+        self._lock = threading.Lock()
+
+    def make(self, directory):
+        with self._lock:
+            if directory in self.created:
+                return
+            directory.mkdir(parents=True, exist_ok=True)
+            self.created.add(directory)
+
+
+class ActionExecutor:
+    """Runs file actions on a thread pool with a concurrency limit per destination device.
+
+    Renames and hardlinks, which mostly wait on metadata round trips (NFS, SMB), share
+    `metadata_per_device` slots per device, copies share `copies_per_device` (one on a
+    spinning disk). A task can wait for earlier tasks, e.g. a rename for the rename that
+    frees its target. Tasks are started in submission order and a task only takes its
+    device slot once what it waits for is done, so waiting never deadlocks the pool.
+    `checker` is the ContentChecker that compares existing targets with their source.
+    """
+
+    def __init__(self, workers=DEFAULT_IO_WORKERS, metadata_per_device=DEFAULT_METADATA_PER_DEVICE, copies_per_device=DEFAULT_COPIES_PER_DEVICE, checker=None):
+        self.workers = max(1, workers)
+        self.checker = checker
+        self.limits = {"metadata": max(1, metadata_per_device), "copy": max(1, copies_per_device)}
+        self.directories = DirectoryMaker()
+        self.devices = {}  # directory: st_dev
+        self.slots = {}  # (st_dev, kind): BoundedSemaphore
+        self._lock = threading.Lock()
+        self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def parallel(self):
+        return self.workers > 1
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+        if self.checker is not None:
+            self.checker.cache.close()
+
+    def device(self, directory):
+        """Returns the st_dev of directory, or of its closest existing parent if it is not created yet."""
+        with self._lock:
+            device = self.devices.get(directory)
+        if device is not None:
+            return device
+        path = directory
+        while True:
+            try:
+                device = os.stat(path).st_dev
+                break
+            except OSError:
+                if path.parent == path:
+                    device = 0
+                    break
+                path = path.parent
+        with self._lock:
+            self.devices[directory] = device
+        return device
+
+    def _slot(self, directory, kind):
+        device = self.device(directory)
+        with self._lock:
+            slot = self.slots.get((device, kind))
+            if slot is None:
+                limit = 1 if kind == "copy" and _rotational(device) else self.limits[kind]
+                slot = self.slots[(device, kind)] = threading.BoundedSemaphore(limit)
+        return slot
+
+    def submit(self, task, directory, kind="metadata", after=()):
+        """Schedules task() once the futures in `after` are done; returns its Future.
+
+        directory is the destination folder whose device limits the task, kind is
+        "metadata" (rename, hardlink) or "copy".
+        """
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="tvrename-io")
+
+        def run():
+            for future in after:
+                future.result()
+            with self._slot(directory, kind):
+                return task()
+
+        return self._pool.submit(run)
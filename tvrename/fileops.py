@@ -0,0 +1,158 @@
+# tvrename/fileops.py
+import os
+import shutil
+import sys
+import threading
+import time
+
+COPY_CHUNK_SIZE = 8 * 1024 * 1024  # Bytes per copy_file_range/sendfile/read call
+FICLONE = 0x40049409  # Linux ioctl that shares the source extents (btrfs, XFS, bcachefs, ...)
+
+
+def _reflink(src_fd, dst_fd):
+    """Clones the source file into the destination without copying data, if the filesystem can."""
+    if not sys.platform.startswith("linux"):
+        return False
+    try:
+        import fcntl
+        fcntl.ioctl(dst_fd, FICLONE, src_fd)
+        return True
+    except OSError:
+        return False
+
+
+def _copy_range(src_fd, dst_fd, size, start=0):
+    """Copies bytes start to size in the kernel with copy_file_range, falling back to sendfile."""
+    for method, copy in (("copy_file_range", getattr(os, "copy_file_range", None)), ("sendfile", getattr(os, "sendfile", None))):
+        if copy is None:
+            continue
+        offset = start
+        os.lseek(dst_fd, start, os.SEEK_SET)
+        try:
+            while offset < size:
+                if method == "copy_file_range":
+                    copied = copy(src_fd, dst_fd, min(COPY_CHUNK_SIZE, size - offset), offset, offset)
+                else:
+                    copied = copy(dst_fd, src_fd, offset, min(COPY_CHUNK_SIZE, size - offset))
+                if copied == 0:
+                    raise OSError(f"Source file shrank during copy ({offset} of {size} bytes)")
+                offset += copied
+        except OSError:
+            if offset != start:
+                raise  # Never resume a partial copy with another method
+            continue
+        return method
+    return None
+
+
+def copy_file(src, dst):
+    """Copies src to dst with constant memory use and returns (bytes copied, seconds, method).
+
+    Uses a reflink when the filesystem supports it, then kernel-side copy_file_range or
+    sendfile, then a chunked read/write loop. The data goes to a temporary file next to
+    dst that is renamed over it once complete, and mtime and permissions are preserved.
+    """
+    start = time.perf_counter()
+    tmp = dst.with_name(f".{dst.name}.tvrename-{os.getpid()}.tmp")
+    size = os.stat(src).st_size
+    try:
+        with open(src, "rb") as fsrc, open(tmp, "wb") as fdst:
+            if _reflink(fsrc.fileno(), fdst.fileno()):
+                method = "reflink"
+            else:
+                method = _copy_range(fsrc.fileno(), fdst.fileno(), size)
+                if method is None:
+                    fsrc.seek(0)
+                    fdst.seek(0)
+                    fdst.truncate()
+                    shutil.copyfileobj(fsrc, fdst, COPY_CHUNK_SIZE)
+                    method = "chunked"
+        shutil.copystat(src, tmp)
+        os.replace(tmp, dst)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+    return size, time.perf_counter() - start, method
+
+
+def resume_copy(src, dst):
+    """Appends the missing end of src to dst, a partial copy of it, and returns (bytes copied, seconds, method).
+
+    Unlike copy_file this writes dst in place; the caller checks the result against src.
+    """
+    start = time.perf_counter()
+    size = os.stat(src).st_size
+    offset = os.stat(dst).st_size
+    with open(src, "rb") as fsrc, open(dst, "r+b") as fdst:
+        method = _copy_range(fsrc.fileno(), fdst.fileno(), size, offset)
+        if method is None:
+            fsrc.seek(offset)
+            fdst.seek(offset)
+            shutil.copyfileobj(fsrc, fdst, COPY_CHUNK_SIZE)
+            method = "chunked"
+    shutil.copystat(src, dst)
+    return size - offset, time.perf_counter() - start, method
+
+
+def format_size(size):
+    """Formats a byte count for humans (e.g. 1.5 GB)."""
+    for unit in ("B", "KB", "MB", "GB", "TB"):
+        if size < 1024 or unit == "TB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+def format_throughput(size, seconds):
+    """Formats a copy rate for humans (e.g. 350.2 MB/s)."""
+    return f"{format_size(size / seconds if seconds > 0 else size)}/s"
+
+
+class InodeIndex:
+    """Maps (device, inode) to the files sharing it, one os.scandir per destination directory.
+
+    Built lazily the first time a directory is looked at and kept up to date as links are
+    created and removed, so finding existing hardlinks of a file costs no extra stat calls.
+    Safe to share between the threads of an ActionExecutor.
+    """
+
+    def __init__(self):
+        self.directories = {}
+        self._lock = threading.Lock()
+
+    def _directory(self, directory):
+        index = self.directories.get(directory)
+        if index is None:
+            index = {}
+            device = os.stat(directory).st_dev
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if not entry.is_file():
+                            continue
+                        # inode() comes with the directory listing on POSIX; symlinks need the target's
+                        key = (entry.stat().st_dev, entry.stat().st_ino) if entry.is_symlink() else (device, entry.inode())
+                    except OSError:
+                        continue
+                    index.setdefault(key, set()).add(directory / entry.name)
+            self.directories[directory] = index
+        return index
+
+    def links(self, directory, source_stat):
+        """Returns the files in directory that share the source file's inode, sorted by name."""
+        with self._lock:
+            return sorted(self._directory(directory).get((source_stat.st_dev, source_stat.st_ino), ()))
+
+    def add(self, path, source_stat):
+        """Records a link created at path to the file described by source_stat."""
+        with self._lock:
+            self._directory(path.parent).setdefault((source_stat.st_dev, source_stat.st_ino), set()).add(path)
+
+    def remove(self, path, source_stat):
+        """Forgets a link removed from path."""
+        with self._lock:
+            paths = self._directory(path.parent).get((source_stat.st_dev, source_stat.st_ino))
+            if paths:
+                paths.discard(path)
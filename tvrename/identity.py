@@ -0,0 +1,163 @@
+# tvrename/identity.py
+import hashlib
+import os
+import sqlite3
+import threading
+from pathlib import Path
+
+from .defaults import VERIFY_LEVELS, DEFAULT_VERIFY
+
+SAMPLE_SIZE = 64 * 1024  # Bytes read at the head, middle and tail of a file
+HASH_CHUNK_SIZE = 8 * 1024 * 1024
+
+# compare() outcomes
+IDENTICAL = "identical"
+PARTIAL = "partial"  # The target holds the start of the source, e.g. an interrupted copy
+DIFFERENT = "different"
+
+
+def _full_hasher():
+    """Returns (name, constructor) of the fastest full-file hash installed: xxhash, BLAKE3, else BLAKE2b."""
+    try:
+        import xxhash
+        return "xxh3_128", xxhash.xxh3_128
+    except ImportError:
+        pass
+    try:
+        import blake3
+        return "blake3", blake3.blake3
+    except ImportError:
+        pass
+    return "blake2b", lambda: hashlib.blake2b(digest_size=16)
+
+
+def _sample_offsets(size):
+    if size <= 3 * SAMPLE_SIZE:
+        return [0]  # Small enough to be read whole
+    return [0, size // 2 - SAMPLE_SIZE // 2, size - SAMPLE_SIZE]
+
+
+def _read_samples(f, size):
+    samples = []
+    for offset in _sample_offsets(size):
+        f.seek(offset)
+        samples.append(f.read(size if size <= 3 * SAMPLE_SIZE else SAMPLE_SIZE))
+    return samples
+
+
+def sampled_digest(path, size):
+    """Hashes the size and the head, middle and tail blocks of a file."""
+    digest = hashlib.blake2b(str(size).encode(), digest_size=16)
+    with open(path, "rb") as f:
+        for sample in _read_samples(f, size):
+            digest.update(sample)
+    return digest.hexdigest()
+
+
+def full_digest(path):
+    """Hashes the whole file with the fastest installed algorithm, returned as "name:hex"."""
+    name, hasher = _full_hasher()
+    digest = hasher()
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(HASH_CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return f"{name}:{digest.hexdigest()}"
+
+
+def is_prefix(source, target, target_size):
+    """Returns True if the sampled blocks of target match the same offsets in source."""
+    with open(source, "rb") as fsrc, open(target, "rb") as fdst:
+        for offset in _sample_offsets(target_size):
+            length = target_size if target_size <= 3 * SAMPLE_SIZE else SAMPLE_SIZE
+            fsrc.seek(offset)
+            fdst.seek(offset)
+            if fsrc.read(length) != fdst.read(length):
+                return False
+    return True
+
+
+class HashCache:
+    """Sampled and full file digests keyed by (device, inode, size, mtime), so a file is read once.
+
+    Kept in memory, and in an SQLite file when a path is given.
+    """
+
+    def __init__(self, path=None):
+        self.memory = {}
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            path = Path(path)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(path), check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS digests ("
+                " dev INTEGER NOT NULL, inode INTEGER NOT NULL, size INTEGER NOT NULL, mtime INTEGER NOT NULL,"
+                " kind TEXT NOT NULL, digest TEXT NOT NULL, PRIMARY KEY (dev, inode, size, mtime, kind)) WITHOUT ROWID"
+            )
+            self._db.commit()
+
+    def digest(self, path, stat, kind):
+        """Returns the "sample" or "full" digest of the file at path with this stat result."""
+        key = (stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns, kind)
+        with self._lock:
+            digest = self.memory.get(key)
+            if digest is None and self._db:
+                row = self._db.execute(
+                    "SELECT digest FROM digests WHERE dev = ? AND inode = ? AND size = ? AND mtime = ? AND kind = ?", key,
+                ).fetchone()
+                if row:
+                    digest = self.memory[key] = row[0]
+        if digest is None:
+            digest = sampled_digest(path, stat.st_size) if kind == "sample" else full_digest(path)
+            with self._lock:
+                self.memory[key] = digest
+                if self._db:
+                    # An inode only keeps the digests of its current content
+                    self._db.execute("DELETE FROM digests WHERE dev = ? AND inode = ? AND (size != ? OR mtime != ?)", key[:4])
+                    self._db.execute("INSERT OR REPLACE INTO digests VALUES (?, ?, ?, ?, ?, ?)", (*key, digest))
+                    self._db.commit()
+        return digest
+
+    def close(self):
+        with self._lock:
+            if self._db:
+                self._db.close()
+                self._db = None
+
+
+class ContentChecker:
+    """Tells whether an existing target already holds the source's content.
+
+    `verify` is how far identical sizes are checked: "size" only, "sample" (head, middle
+    and tail blocks) or "full" (a complete xxhash, BLAKE3 or BLAKE2b hash). A target
+    smaller than its source whose blocks match the source is a partial copy.
+    """
+
+    def __init__(self, verify=DEFAULT_VERIFY, cache=None):
+        self.verify = verify
+        self.cache = cache or HashCache()
+
+    def compare(self, source, target):
+        """Returns IDENTICAL, PARTIAL or DIFFERENT for an existing target."""
+        source_stat = os.stat(source)
+        target_stat = os.stat(target)
+        if (source_stat.st_dev, source_stat.st_ino) == (target_stat.st_dev, target_stat.st_ino):
+            return IDENTICAL  # Already a hardlink of the source
+        if target_stat.st_size < source_stat.st_size:
+            return PARTIAL if is_prefix(source, target, target_stat.st_size) else DIFFERENT
+        if target_stat.st_size != source_stat.st_size:
+            return DIFFERENT
+        for kind in VERIFY_LEVELS[1:VERIFY_LEVELS.index(self.verify) + 1]:
+            if self.cache.digest(source, source_stat, kind) != self.cache.digest(target, target_stat, kind):
+                return DIFFERENT
+        return IDENTICAL
+
+    def matches(self, source, target):
+        """Returns True if target has the sampled content of source, e.g. after a resumed copy."""
+        source_stat = os.stat(source)
+        target_stat = os.stat(target)
+        return source_stat.st_size == target_stat.st_size and self.cache.digest(source, source_stat, "sample") == self.cache.digest(target, target_stat, "sample")
@@ -0,0 +1,49 @@
+# tvrename/jobs.py
+import os
+
+from .core import plan_file
+from .naming import EpisodeNamer
+
+MIN_FILES_PER_JOB = 1000  # Below this a worker process costs more to start than it saves
+
+# Set once per worker process by _init_worker
+_worker = {}
+
+
+def job_count(jobs, files):
+    """Returns how many worker processes are worth starting for `files` files (0: use all CPUs)."""
+    if jobs <= 0:
+        jobs = os.cpu_count() or 1
+    return max(1, min(jobs, files // MIN_FILES_PER_JOB))
+
+
+def _init_worker(series_name, matcher, action, output_path, format_string, sources):
+    _worker.update(
+        series_name=series_name, matcher=matcher, action=action, output_path=output_path,
+        format_string=format_string, sources=sources, namer=EpisodeNamer(format_string, series_name, matcher),
+    )
+
+
+def _plan_file(item):
+    file, parsed = item
+    return plan_file(
+        file, _worker["series_name"], _worker["matcher"], _worker["action"], _worker["output_path"],
+        _worker["format_string"], _worker["sources"], parsed, namer=_worker["namer"],
+    )
+
+
+def plan_in_processes(files, series_name, matcher, action, output_path, format_string, sources, parsed, jobs):
+    """Runs plan_file for every file on a pool of `jobs` processes and returns the entries in file order.
+
+    The matcher, with its episode table, and the other run settings reach each worker once,
+    through the pool initializer. Tasks only carry a path and its parse_filename result,
+    and the results come back in submission order so the plan is the same as a serial run.
+    """
+    from concurrent.futures import ProcessPoolExecutor  # Pulls in multiprocessing, only needed with --jobs
+
+    chunksize = max(1, len(files) // (jobs * 4))
+    with ProcessPoolExecutor(
+        max_workers=jobs, initializer=_init_worker,
+        initargs=(series_name, matcher, action, output_path, format_string, sources),
+    ) as executor:
+        return list(executor.map(_plan_file, ((file, parsed.get(file)) for file in files), chunksize=chunksize))
@@ -0,0 +1,142 @@
+# tvrename/journal.py
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from pathlib import Path
+
+from .cache import default_cache_dir
+
+# A decision taken for a source file: status is "ok" (applied), "exists" (target was
+# already there) or "unmatched" (no episode matched, target and season are None)
+JournalRecord = namedtuple("JournalRecord", [
+    "source", "target", "action", "status", "season", "episode", "settings", "metadata_version",
+])
+
+ALL_SEASONS = "*"  # Version key of unmatched files, any season change may make them match
+
+
+def _digest(value):
+    return hashlib.sha1(json.dumps(value, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()[:16]
+
+
+def metadata_versions(episode_table):
+    """Returns {season_number: version} fingerprints of an EpisodeTable, plus ALL_SEASONS for all of them.
+
+    Only the fields a file name can depend on are fingerprinted, so an edited overview
+    or still does not invalidate earlier decisions.
+    """
+    versions = {
+        season_number: _digest([(episode.episode, episode.title, episode.air_date) for episode in episodes])
+        for season_number, episodes in episode_table.seasons.items()
+    }
+    versions[ALL_SEASONS] = _digest(sorted((str(n), v) for n, v in versions.items()))
+    return versions
+
+
+def settings_version(*settings):
+    """Fingerprints the options a decision depends on (series, action, format, output, shift, ...)."""
+    return _digest([str(setting) for setting in settings])
+
+
+def file_key(stat):
+    return stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+class Journal:
+    """SQLite record of what earlier runs decided for each file, keyed by (device, inode, size, mtime).
+
+    A file whose key, settings and season data are unchanged since its decision was
+    recorded does not need to be matched again.
+    """
+
+    def __init__(self, path=None):
+        self.path = Path(path) if path else default_cache_dir() / "journal.sqlite3"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS decisions ("
+            " dev INTEGER NOT NULL, inode INTEGER NOT NULL, size INTEGER NOT NULL, mtime INTEGER NOT NULL,"
+            " source TEXT NOT NULL, target TEXT, action TEXT, status TEXT NOT NULL,"
+            " season INTEGER, episode INTEGER, settings TEXT NOT NULL, metadata_version TEXT NOT NULL,"
+            " recorded_at REAL NOT NULL, PRIMARY KEY (dev, inode, size, mtime)) WITHOUT ROWID"
+        )
+        self._db.commit()
+
+    def lookup(self, stat):
+        """Returns the JournalRecord of the file with this stat result, or None."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT source, target, action, status, season, episode, settings, metadata_version"
+                " FROM decisions WHERE dev = ? AND inode = ? AND size = ? AND mtime = ?", file_key(stat),
+            ).fetchone()
+        return JournalRecord(*row) if row else None
+
+    def record(self, decisions):
+        """Stores (stat, JournalRecord) pairs in one transaction, replacing older entries of the same inode."""
+        now = time.time()
+        with self._lock:
+            for stat, record in decisions:
+                dev, inode, size, mtime = file_key(stat)
+                self._db.execute("DELETE FROM decisions WHERE dev = ? AND inode = ?", (dev, inode))
+                self._db.execute(
+                    "INSERT INTO decisions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (dev, inode, size, mtime, *record, now),
+                )
+            self._db.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        with self._lock:
+            if self._db is None:
+                return
+            self._db.commit()
+            self._db.close()
+            self._db = None
+
+
+def is_current(record, path, settings, versions):
+    """Returns True if a recorded decision still holds for the file now at path.
+
+    The file must still be at its source path or be the target it was renamed or linked
+    to, the run settings and the season data behind the decision must be unchanged, and
+    the target of an applied decision must still exist.
+    """
+    path = str(path)
+    if path not in (record.source, record.target) or record.settings != settings:
+        return False
+    version_key = ALL_SEASONS if record.season is None else record.season
+    if versions.get(version_key) != record.metadata_version:
+        return False
+    return record.target is None or os.path.lexists(record.target)
+
+
+def plan_decisions(plan, files, file_stats, settings, versions):
+    """Returns the (stat, JournalRecord) pairs to store after a plan was applied.
+
+    Applied and already existing targets are recorded once the target is on disk, files
+    that matched nothing as "unmatched". Collisions are left out so they are retried.
+    """
+    planned = set()
+    decisions = []
+    for entry in plan:
+        planned.add(entry.source)
+        stat = file_stats.get(Path(entry.source))
+        if stat is None or entry.status not in ("ok", "exists") or not os.path.lexists(entry.target):
+            continue
+        decisions.append((stat, JournalRecord(
+            entry.source, entry.target, entry.action, entry.status, entry.season, entry.episode, settings, versions[entry.season],
+        )))
+    for file in files:
+        if str(file) not in planned and file in file_stats:
+            decisions.append((file_stats[file], JournalRecord(str(file), None, None, "unmatched", None, None, settings, versions[ALL_SEASONS])))
+    return decisions
@@ -0,0 +1,65 @@
+# tvrename/library.py
+import io
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .defaults import DEFAULT_LIBRARY_WORKERS
+
+
+def find_series_folders(root):
+    """Returns the series folders directly under a library root, skipping hidden ones."""
+    return sorted(
+        (entry for entry in root.iterdir() if entry.is_dir() and not entry.name.startswith(".")),
+        key=lambda entry: entry.name.lower(),
+    )
+
+
+class _ThreadOutput:
+    """Stand-in for sys.stdout that sends each worker thread's output to its own buffer."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.local = threading.local()
+
+    def write(self, text):
+        buffer = getattr(self.local, "buffer", None)
+        return (buffer or self.stream).write(text)
+
+    def flush(self):
+        self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+def process_library(folders, run_folder, workers=DEFAULT_LIBRARY_WORKERS):
+    """Runs run_folder over every series folder on a bounded thread pool.
+
+    The output of each folder is printed in one piece once it is done so parallel
+    series do not interleave. Returns (folder, summary, error) tuples in folder order.
+    """
+    output = _ThreadOutput(sys.stdout)
+    print_lock = threading.Lock()
+
+    def run(folder):
+        output.local.buffer = io.StringIO()
+        summary, error = None, None
+        try:
+            summary = run_folder(folder)
+        except Exception as e:
+            error = str(e)
+            print(f"Error: {e}")
+        text = output.local.buffer.getvalue()
+        output.local.buffer = None
+        with print_lock:
+            output.stream.write(f"\n=== {folder.name} ===\n{text}")
+            output.stream.flush()
+        return folder, summary, error
+
+    sys.stdout = output
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            return list(executor.map(run, folders))
+    finally:
+        sys.stdout = output.stream
@@ -1,16 +1,28 @@
 #!/usr/bin/env python3
 # tvrename/main.py
+import argparse
 import os
+import time
+from contextlib import nullcontext
 from pathlib import Path
-from dotenv import load_dotenv
-from colorama import init, Fore, Style
-from glob import glob
 
 from .args import parse_arguments
 from .config import load_config
-from .core import fetch_series_details, process_file
+from .core import fetch_series_details, fetch_series_seasons, build_plan, execute_plan
+from .plan import save_plan, load_plan, resolve_plan
+from .cache import MetadataCache, default_cache_dir
+from .tmdb import TMDbClient
+from .matcher import EpisodeMatcher, parse_filename
+from .scanner import InputScanner
+from .titlematch import TitleMatcher
+from .stats import RunStats, profiled
+from .journal import Journal, metadata_versions, settings_version, is_current, plan_decisions
+from .watch import open_watcher, PendingFiles, UNMATCHED_REFRESH_MINUTES
+from .library import find_series_folders, process_library
+from .fileops import InodeIndex
+from .executor import ActionExecutor
+from .identity import ContentChecker, HashCache
 from .utils import sanitize_filename, extract_from_folder_name #Import extract from folder name function
-import requests  # Import requests here
 
 
 # Regular colors
@@ -26,9 +38,6 @@ green_bold = "\033[1;32m"
 # Reset
 reset = "\033[0m"
 
-# Initialize colorama
-init(autoreset=True)
-
 # Default path based on OS
 if os.name == 'nt':
     # print("This is a Windows system.")
@@ -37,162 +46,454 @@ if os.name == 'nt':
 else:
     default_env_path = "/etc/tvrename/.env"
 
-# Then use the default path
-dotenv_path = os.getenv("DOTENV_PATH", default_env_path)
 
-# Check if the .env file exists before loading
-if Path(dotenv_path).exists():
-    load_dotenv(dotenv_path=dotenv_path)
-else:
-    print(f"Warning: .env file not found at {dotenv_path}")
-
-# After loading the API key, add validation
-API_KEY = os.getenv("API_KEY")
-if not API_KEY:
-    print(f"{red_bold}Error: API_KEY not found in environment variables{reset}")
-    print(f"Please ensure your API key is set in {dotenv_path}")
-    print("You can:")
-    print("1. Create a .env file with: API_KEY=your_tmdb_api_key")
-    print("2. Or set the environment variable: export API_KEY=your_tmdb_api_key")
-    exit(1)
+def resolve_api_key():
+    """Returns the TMDb API key from the environment or the .env file at DOTENV_PATH.
 
-def main():
-    """Main function to run the tvrename script."""
-    args = parse_arguments()
+    Called by the TMDb client at its first request, so runs answered from the cache or a
+    metadata bundle neither read .env nor need a key.
+    """
+    dotenv_path = os.getenv("DOTENV_PATH", default_env_path)
+    if not os.getenv("API_KEY"):
+        # Check if the .env file exists before loading
+        if Path(dotenv_path).exists():
+            from dotenv import load_dotenv
+            load_dotenv(dotenv_path=dotenv_path)
+        else:
+            print(f"Warning: .env file not found at {dotenv_path}")
+    api_key = os.getenv("API_KEY")
+    if not api_key:
+        raise Exception(
+            f"API_KEY not found in environment variables. Set API_KEY=your_tmdb_api_key in {dotenv_path} or the environment, "
+            "or run offline with a bundle from \"tvrename metadata export\": --metadata-bundle PATH"
+        )
+    return api_key
 
-    # Collect files from all input patterns
-    files = []
-    for input_pattern in args.input:
-        # Resolve input path
-        input_path_str = input_pattern
-        input_path = Path(input_path_str).resolve()
-
-        if '*' in input_path_str:
-            # Find the directory containing the wildcard
-            base_dir = Path(os.path.dirname(input_path_str)).resolve()
-            if not base_dir.exists():
-                print(f"Error: The specified input path does not exist: {base_dir}")
-                continue  # Skip to the next pattern
-
-            # Use glob to find files matching the wildcard
-            found_files = [Path(f).resolve() for f in glob(input_path_str)]
-            if not found_files:
-                print(f"Warning: No files found matching the wildcard: {input_path_str}")  # Changed to warning
-                continue  # Skip to the next pattern
-            files.extend(found_files)
+
+def open_client(args):
+    """Opens the metadata cache and the TMDb client shared by every series of a run.
+
+    With --metadata-bundle (and not exporting one) the client answers from the bundle
+    alone and no API key is needed.
+    """
+    if args.metadata_bundle and args.command != "metadata":
+        from .bundle import MetadataBundle
+        return TMDbClient(None, None, args.timeout, args.workers, args.rate_limit, args.max_retries, MetadataBundle(args.metadata_bundle))
+    cache = None
+    if not args.no_cache:
+        cache = MetadataCache(args.cache_dir, args.cache_ttl, args.cache_airing_ttl, args.cache_max_size, args.refresh)
+    return TMDbClient(resolve_api_key, cache, args.timeout, args.workers, args.rate_limit, args.max_retries)
+
+
+def export_metadata(args, client):
+    """Writes the series of --series and --series-file to the --metadata-bundle file; returns the failures."""
+    if args.subcommand != "export":
+        raise Exception("Usage: tvrename metadata export --metadata-bundle PATH --series ID_OR_TITLE [...] [--series-file FILE]")
+    if not args.metadata_bundle:
+        raise Exception("metadata export needs --metadata-bundle PATH to write to")
+    from .bundle import export_bundle, read_queries
+
+    queries = read_queries(args.series, args.series_file)
+    if not queries:
+        raise Exception("metadata export needs TMDb IDs or titles in --series or --series-file")
+    return export_bundle(args.metadata_bundle, queries, client, args.lang)
+
+
+def load_series(args, client, current_folder, stats):
+    """Resolves the series from --q or the folder name and fetches its seasons.
+
+    Returns (tmdb_id, series_name, episode_table, failed_seasons).
+    """
+    tmdb_id, series_name = None, None
+    if args.q:
+        tmdb_id = args.q if args.q.isdigit() else None
+        series_name = args.q if not tmdb_id else None
+    else:
+        tmdb_id, series_name = extract_from_folder_name(current_folder)
+
+    if not tmdb_id and not series_name:
+        raise Exception("Could not determine TMDb ID or series name.")
+
+    # Fetch series, season and episode details
+    with stats.stage("metadata"):
+        if not tmdb_id:
+            tmdb_id = str(fetch_series_details(series_name, client, args.lang)["id"])
+        details_data, episode_table, failed_seasons = fetch_series_seasons(tmdb_id, client, args.lang, args.season)
+    tmdb_id = details_data["id"]
+    series_name = sanitize_filename(details_data["name"])
+    print(f"Series found: {green_bold}{series_name} [tmdbid-{tmdb_id}]{reset}")
+
+    for season_number in sorted(set(episode_table.seasons) | set(failed_seasons)):
+        if season_number in episode_table:
+            print(f"Fetched data for season {season_number}")
         else:
-            if not input_path.exists():
-                print(f"Error: The specified input path does not exist: {input_path}")
-                continue  # Skip to the next pattern
-            if input_path.is_file():
-                files.append(input_path)
-            else:  # is directory
-                if args.recursive: # Added recursive check
-                    files.extend([f for f in input_path.rglob("*") if f.is_file()]) # ADDED: rglob
-                else:
-                    files.extend([f for f in input_path.iterdir() if f.is_file()])
+            print(f"{red_bold}=Failed= to fetch Season {season_number} details: {failed_seasons[season_number]}{reset}")
+
+    return tmdb_id, series_name, episode_table, failed_seasons
+
+
+def run_series(args, client, stats=None, journal=None, executor=None, apply=True):
+    """Renames the files of one series and returns a summary of the run.
 
+    Stage timings and counters are added to `stats` (a RunStats) when given. With a
+    Journal, files whose recorded decision still holds are skipped without matching.
+    Actions run on `executor` (an ActionExecutor) when given, else one at a time; without
+    `apply` (or with --export-plan) the files are only matched.
+    Raises an Exception when the series cannot be processed at all.
+    """
+    if stats is None:
+        stats = RunStats()
+
+    # Walk the inputs once, parsing names as they stream in; .config turns up on the way.
+    # Files the journal knows are only parsed if their decision turns out to be stale.
+    # With --jobs the worker processes parse the names instead.
+    parse_names = args.jobs == 1
+    scanner = InputScanner(args.input, args.recursive, args.include, args.exclude, args.extensions)
+    files = []
+    parsed = {}
+    file_stats = {}
+    journaled = {}
+    parse_seconds = 0.0
+    with stats.stage("scan"):
+        for file in scanner:
+            if journal:
+                try:
+                    file_stats[file] = os.stat(file)
+                except OSError:
+                    continue
+                record = None if args.rescan else journal.lookup(file_stats[file])
+                if record:
+                    files.append(file)
+                    journaled[file] = record
+                    continue
+            if parse_names:
+                start = time.perf_counter()
+                parsed[file] = parse_filename(file.name)
+                parse_seconds += time.perf_counter() - start
+            files.append(file)
+    # Parsing is matching work, even though it overlaps the walk
+    stats.add_time("scan", -parse_seconds)
+    stats.add_time("match", parse_seconds)
+    stats.count("files", len(files))
     if not files:
-        print("Error: No files found based on the provided input patterns.")
-        exit(1)
+        raise Exception("No files found based on the provided input patterns.")
 
     # Resolve output path
     output_path = Path(args.output).resolve() if args.output else None
 
     # Load configuration
-    config_path = None
-    for input_pattern in args.input:
-        input_path = Path(input_pattern).resolve()
-        if input_path.is_dir():
-            config_files = list(input_path.glob("**/.config"))
-            if config_files:
-                config_path = config_files[0]
-                break
-    if not config_path:
-        config_path = Path(".") / ".config"
-    episode_shift = load_config(config_path)
+    with stats.stage("config"):
+        shift_config = load_config(scanner.config_path or Path(".") / ".config")
 
     # Determine current folder name
     if args.input and args.input != ['.']: #If input is not default value
         current_folder = Path(args.input[0]).name
     else:
         current_folder = Path(".").resolve().name  # Get the real current directory
-    tmdb_id, series_name = None, None
+    tmdb_id, series_name, episode_table, failed_seasons = load_series(args, client, current_folder, stats)
 
-    if args.q:
-        tmdb_id = args.q if args.q.isdigit() else None
-        series_name = args.q if not tmdb_id else None
+    if journal:
+        settings = settings_version(tmdb_id, args.lang, args.season, args.action, output_path, args.format, shift_config, args.title_match, args.title_threshold)
+        versions = metadata_versions(episode_table)
+        unchanged = {file for file, record in journaled.items() if is_current(record, file, settings, versions)}
+        if unchanged:
+            print(f"Skipping {len(unchanged)} unchanged file(s) handled in an earlier run")
+            stats.count("journal_skipped", len(unchanged))
+            files = [file for file in files if file not in unchanged]
+        if parse_names:
+            with stats.stage("match"):
+                for file in journaled:
+                    if file not in unchanged:
+                        parsed[file] = parse_filename(file.name)
+
+    # Match every file once into a plan, then apply it
+    stats.count("parsed", len(parsed) if parse_names else len(files))
+    with stats.stage("match"):
+        matcher = EpisodeMatcher(episode_table, shift_config)
+        title_matcher = TitleMatcher(matcher, series_name, args.title_threshold) if args.title_match else None
+        plan = build_plan(files, series_name, matcher, args.action, output_path, args.format, parsed, title_matcher, args.jobs)
+    stats.count("matched", len(plan))
+    stats.count("title_matched", sum(1 for entry in plan if entry.pattern.startswith("title")))
+
+    if args.export_plan or not apply:
+        planned = sum(1 for entry in plan if entry.status == "ok")
+        print(f"{green_bold}Planned file(s): {planned}{reset} ({len(plan) - planned} skipped)")
+        processed_files_count = 0
     else:
-        tmdb_id, series_name = extract_from_folder_name(current_folder)
+        with stats.stage("action"):
+            processed_files_count = execute_plan(plan, args.rename_hardlink, InodeIndex(), stats, executor)
+        stats.count("applied", processed_files_count)
+        print_total(args.action, processed_files_count)
+        if journal and args.action != "dry-run":
+            journal.record(plan_decisions(plan, files, file_stats, settings, versions))
 
-    if not tmdb_id and not series_name:
-        print("Error: Could not determine TMDb ID or series name.")
-        exit(1)
+    return {
+        "series": series_name,
+        "tmdb_id": tmdb_id,
+        "files": len(files),
+        "processed": processed_files_count,
+        "failed_seasons": sorted(failed_seasons),
+        "plan": plan,
+    }
 
-    try:
-        series_details = fetch_series_details(tmdb_id or series_name, API_KEY, args.lang)
-        tmdb_id = series_details["id"]
-        series_name = sanitize_filename(series_details["name"])
-        print(f"Series found: {green_bold}{series_name} [tmdbid-{tmdb_id}]{reset}")
-    except Exception as e:
-        print(f"Error: {e}") #Modified
-        exit(1)
 
-    # Fetch season and episode details
-    details_url = f"https://api.themoviedb.org/3/tv/{tmdb_id}?api_key={API_KEY}&include_adult=true&language={args.lang}"
-    response = requests.get(details_url)
-    if response.status_code != 200:
-        print(f"Failed to fetch series details: {response.status_code}")
-        exit(1)
+def print_total(action, processed_files_count):
+    """Prints the total number of processed files."""
+    if processed_files_count:
+        if action == "dry-run":
+            print(f"{green_bold}Total file(s) going to processe: {processed_files_count}{reset}")
+        else:
+            print(f"{green_bold}Total file(s) processed: {processed_files_count}{reset}")
+    else:
+        print(f"{yellow_bold}No matching files found for processing.{reset}")
 
-    details_data = response.json()
-    seasons = details_data.get("seasons", [])
 
-    # Fetch and cache season data
-    season_data_cache = {}
-    season_numbers = {season["season_number"] for season in seasons}
+def apply_plan(args, stats, executor=None):
+    """Applies a plan exported with --export-plan, optionally with another action."""
+    entries = load_plan(args.apply_plan)
+    if args.action:
+        entries = resolve_plan([entry._replace(action=args.action, status="ok", conflict=None) for entry in entries])
+    print(f"Loaded plan with {len(entries)} file(s) from {args.apply_plan}")
+    stats.count("matched", len(entries))
+    with stats.stage("action"):
+        processed_files_count = execute_plan(entries, args.rename_hardlink, stats=stats, executor=executor)
+    stats.count("applied", processed_files_count)
+    print_total(args.action or (entries[0].action if entries else None), processed_files_count)
 
-    # Add the specified season if it is not in the list
-    if args.season is not None and args.season not in season_numbers:
-        season_numbers.add(args.season)
 
-    for season_number in season_numbers:
-        if args.season is not None and season_number != args.season:
-            # print(f"Skipping season {season_number} as it does not match the specified season {args.season}")
-            continue
+def run_library(args, client, stats, journal=None, executor=None, apply=True):
+    """Processes every series folder under args.library and prints a per-series summary.
 
-        season_url = f"https://api.themoviedb.org/3/tv/{tmdb_id}/season/{season_number}?api_key={API_KEY}&include_adult=true&language={args.lang}"
-        season_response = requests.get(season_url)
-        if season_response.status_code == 200:
-            season_data_cache[season_number] = season_response.json()
-            print(f"Fetched data for season {season_number}")
-        else:
-            print(f"{red_bold}=Failed= to fetch Season {season_number} details: {season_response.status_code}{reset}")
-            continue
-
-    # Initialize processed files counter and a flag to check if any file was processed
-    processed_files_count = 0
-    any_file_processed = False
-
-    # Process files using cached data
-    for file in files:
-        # print(f"Processing file: {file.name}")
-        if not file.is_file() or "BitComet" in file.name:
-            continue
-
-        #process_file(file, series_name, season_data_cache, episode_shift, args, output_path)
-        if process_file(file, series_name, season_data_cache, episode_shift, args, output_path):
-            processed_files_count += 1
-            any_file_processed = True  # Set the flag to True if any file was processed
-            
-    # Print the total number of processed files
-    if any_file_processed:
-        if args.action == "dry-run":
-            print(f"{green_bold}Total file(s) going to processe: {processed_files_count}{reset}")
+    Returns the number of failed series and the combined plan of all series.
+    """
+    root = Path(args.library).resolve()
+    if not root.is_dir():
+        raise Exception(f"The specified library path is not a directory: {root}")
+    folders = find_series_folders(root)
+    if not folders:
+        raise Exception(f"No series folders found in {root}")
+    print(f"Found {len(folders)} series folder(s) in {root}")
+
+    def run_folder(folder):
+        # Each folder is a series of its own: its name resolves it, its files are walked recursively
+        folder_args = argparse.Namespace(**vars(args))
+        folder_args.q = None
+        folder_args.input = [str(folder)]
+        folder_args.recursive = True
+        folder_args.output = str(Path(args.output) / folder.name) if args.output else None
+        return run_series(folder_args, client, stats, journal, executor, apply)
+
+    results = process_library(folders, run_folder, args.library_workers)
+
+    print(f"\n{green_bold}Library summary:{reset}")
+    failures = 0
+    for folder, summary, error in results:
+        if error:
+            failures += 1
+            print(f"{red_bold}[FAILED]{reset} {folder.name}: {error}")
         else:
-            print(f"{green_bold}Total file(s) processed: {processed_files_count}{reset}")
+            failed_seasons = f" {red_bold}(failed seasons: {', '.join(map(str, summary['failed_seasons']))}){reset}" if summary["failed_seasons"] else ""
+            print(f"{green}[OK]{reset} {summary['series']} [tmdbid-{summary['tmdb_id']}]: {summary['processed']}/{summary['files']} file(s){failed_seasons}")
+    print(f"{green_bold}Series processed: {len(results) - failures}/{len(results)}{reset}")
+    return failures, [entry for _, summary, _ in results if summary for entry in summary["plan"]]
+
+
+def run_watch(args, client, stats, executor=None):
+    """Watches the input folders, or every series folder of --library, and processes files as they arrive.
+
+    Series metadata is fetched once per series and kept in memory, refreshed every
+    --watch-refresh hours or early when a new file matches no episode. Runs until Ctrl+C.
+    """
+    if args.library:
+        library_root = Path(args.library).resolve()
+        if not library_root.is_dir():
+            raise Exception(f"The specified library path is not a directory: {library_root}")
+        roots, recursive = [library_root], True
     else:
-        print(f"{yellow_bold}No matching files found for processing.{reset}")
+        roots, recursive = [Path(pattern).resolve() for pattern in args.input], args.recursive
+        for root in roots:
+            if not root.is_dir():
+                raise Exception(f"watch needs input directories, not: {root}")
+    output_root = Path(args.output).resolve() if args.output else None
+    scanner = InputScanner([], recursive, args.include, args.exclude, args.extensions)
+    loaded = {}  # series folder: dict with the series name, matchers and load time
+    produced = set()  # Targets written by the watch itself, their events are not new downloads
+    inode_index = InodeIndex()
+
+    def series_folder(path):
+        if args.library:
+            parts = path.relative_to(library_root).parts
+            return library_root / parts[0] if len(parts) > 1 else None
+        return next((root for root in roots if root in path.parents), None)
+
+    def load(folder, refresh=False):
+        folder_args = argparse.Namespace(**vars(args))
+        if args.library:
+            folder_args.q = None
+        with stats.stage("config"):
+            shift_config = load_config(folder / ".config")
+        cache = client.cache
+        if refresh and cache:
+            cache.refresh = True  # Fetch again even if the cached copy has not expired yet
+        try:
+            _, series_name, episode_table, _ = load_series(folder_args, client, folder.name, stats)
+        finally:
+            if cache:
+                cache.refresh = args.refresh
+        matcher = EpisodeMatcher(episode_table, shift_config)
+        loaded[folder] = {
+            "series_name": series_name,
+            "matcher": matcher,
+            "title_matcher": TitleMatcher(matcher, series_name, args.title_threshold) if args.title_match else None,
+            "loaded_at": time.monotonic(),
+        }
+        return loaded[folder]
+
+    def plan_files(state, folder, files, parsed):
+        output_path = (output_root / folder.name if args.library else output_root) if output_root else None
+        with stats.stage("match"):
+            return build_plan(files, state["series_name"], state["matcher"], args.action, output_path, args.format, parsed, state["title_matcher"])
+
+    def process(folder, files):
+        state = loaded.get(folder) or load(folder)
+        with stats.stage("match"):
+            parsed = {file: parse_filename(file.name) for file in files}
+        stats.count("files", len(files))
+        stats.count("parsed", len(files))
+        plan = plan_files(state, folder, files, parsed)
+        unmatched = len(files) - len(plan)
+        if unmatched and time.monotonic() - state["loaded_at"] >= UNMATCHED_REFRESH_MINUTES * 60:
+            print(f"{yellow}{unmatched} new file(s) matched no episode, refreshing {state['series_name']}{reset}")
+            state = load(folder, refresh=True)
+            plan = plan_files(state, folder, files, parsed)
+        stats.count("matched", len(plan))
+        with stats.stage("action"):
+            processed_files_count = execute_plan(plan, args.rename_hardlink, inode_index, stats, executor)
+        stats.count("applied", processed_files_count)
+        produced.update(entry.target for entry in plan if entry.status == "ok")
+        print_total(args.action, processed_files_count)
+
+    watcher = open_watcher([str(root) for root in roots], recursive, args.poll, args.poll_interval)
+    pending = PendingFiles(args.settle)
+    if args.process_existing:
+        for root in roots:
+            for file in InputScanner([str(root)], recursive, args.include, args.exclude, args.extensions):
+                pending.touch(str(file), closed=True)
+    print(f"Watching {', '.join(map(str, roots))}{' recursively' if recursive else ''} with {'inotify' if hasattr(watcher, 'fd') else 'polling'}. Press Ctrl+C to stop.")
+
+    try:
+        while True:
+            now = time.monotonic()
+            refresh_due = [state["loaded_at"] + args.watch_refresh * 3600 - now for state in loaded.values()]
+            timeouts = [timeout for timeout in [pending.next_check()] + refresh_due if timeout is not None]
+            for path, closed in watcher.read(max(0.0, min(timeouts)) if timeouts else None):
+                name = os.path.basename(path)
+                if name == ".config":
+                    folder = series_folder(Path(path))
+                    if loaded.pop(folder, None):
+                        print(f"Configuration of {folder.name} changed, it is reloaded with the next file")
+                elif path in produced:
+                    produced.discard(path)
+                elif scanner.wanted(name):
+                    pending.touch(path, closed)
+
+            groups = {}
+            for path in pending.ready():
+                folder = series_folder(Path(path))
+                if folder is not None:
+                    groups.setdefault(folder, []).append(Path(path))
+            for folder, files in groups.items():
+                print(f"\n{green_bold}{len(files)} new file(s) in {folder.name}{reset}")
+                try:
+                    process(folder, files)
+                except Exception as e:
+                    print(f"Error: {e}")
+
+            for folder, state in list(loaded.items()):
+                if time.monotonic() - state["loaded_at"] >= args.watch_refresh * 3600:
+                    try:
+                        load(folder, refresh=True)
+                    except Exception as e:
+                        state["loaded_at"] = time.monotonic()  # Try again at the next refresh
+                        print(f"Error: Could not refresh {folder.name}: {e}")
+    except KeyboardInterrupt:
+        print("\nStopped watching.")
+    finally:
+        watcher.close()
+
+
+def run(args, client=None, stats=None, apply=True):
+    """Runs tvrename in-process for an args namespace, e.g. parse_arguments(["--q", "12345"]).
+
+    Does what the command line does, but raises an Exception instead of exiting and
+    returns {"failures": ..., "plan": [PlanEntry, ...], "client": ..., "stats": ...}.
+    Without `apply` files are only matched, like with --export-plan. A client passed in
+    (to share its cache and session between runs) is left open, one opened here is closed.
+    """
+    if stats is None:
+        stats = RunStats()
+    own_client = client is None and not args.apply_plan
+    if own_client:
+        client = open_client(args)
+    # The action pool and the content hash cache only exist for runs that apply actions
+    executor = None
+    if args.apply_plan or args.command == "watch" or (args.command != "metadata" and apply and not args.export_plan):
+        hash_cache = HashCache(None if args.no_cache else Path(args.cache_dir or default_cache_dir()) / "hashes.sqlite3")
+        executor = ActionExecutor(args.io_workers, args.metadata_per_device, args.copies_per_device, ContentChecker(args.verify, hash_cache))
+
+    entries = []
+    try:
+        with profiled(args.profile, args.profiler) if args.profile else nullcontext(), executor or nullcontext():
+            if args.apply_plan:
+                apply_plan(args, stats, executor)
+                failures = 0
+            elif args.command == "metadata":
+                failures = export_metadata(args, client)
+            elif args.command == "watch":
+                run_watch(args, client, stats, executor)
+                failures = 0
+            else:
+                with nullcontext() if args.no_journal else Journal(args.journal) as journal:
+                    if args.library:
+                        failures, entries = run_library(args, client, stats, journal, executor, apply)
+                    else:
+                        summary = run_series(args, client, stats, journal, executor, apply)
+                        failures, entries = 0, summary["plan"]
+                if args.export_plan:
+                    save_plan(args.export_plan, entries, None if args.library else summary["series"])
+                    print(f"Plan written to {args.export_plan}")
+    finally:
+        if own_client:
+            client.close()
+    return {"failures": failures, "plan": entries, "client": client, "stats": stats}
+
+
+def plan(args, client=None, stats=None):
+    """Matches the files args selects without touching them and returns the PlanEntry list."""
+    return run(args, client, stats, apply=False)["plan"]
+
+
+def main():
+    """Main function to run the tvrename script."""
+    from colorama import init  # Only the command line needs colored output on Windows
+
+    args = parse_arguments()
+    init(autoreset=True)
+    try:
+        result = run(args)
+    except Exception as e:
+        print(f"Error: {e}") #Modified
+        exit(1)
+
+    client, stats = result["client"], result["stats"]
+    if client and client.counters["retries"]:
+        print(f"{yellow}TMDb requests retried: {client.counters['retries']} (throttled: {client.counters['throttled']}, server errors: {client.counters['server_errors']}, connection errors: {client.counters['connection_errors']}){reset}")
+    if args.stats:
+        stats.print_summary(client)
+    if args.stats_json:
+        stats.write_json(args.stats_json, client)
+    if result["failures"]:
+        exit(1)
 
 # Add this block
 if __name__ == "__main__":
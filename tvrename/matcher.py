@@ -0,0 +1,216 @@
+# tvrename/matcher.py
+import re
+from collections import namedtuple
+from .utils import normalize_filename
+from .episodes import EpisodeTable
+from .config import ShiftConfig
+
+# Every pattern below is the generic form of one of the per-episode patterns that
+# process_file used to rebuild for each (season, episode) pair. Each filename is
+# scanned once, the captured digit runs are checked against the padding the old
+# f-string used ("02d" for {n:02d}, "0?" for 0?{n}, ...) and the resulting numbers
+# are looked up in an index keyed by (season, local_episode).
+
+# (label, regex, season form, episode form)
+SEASON_PATTERNS = [
+    ("S00E00", re.compile(r"\bS([0-9]+)E([0-9]+)\b", re.IGNORECASE), "02d", "02d"),
+    ("S00EP00", re.compile(r"\bS([0-9]+)EP([0-9]+)\b", re.IGNORECASE), "02d", "02d"),
+    ("0x00", re.compile(r"\b([0-9]+)x([0-9]+)\b", re.IGNORECASE), "0?", "02d"),
+    ("0xSpecial 0", re.compile(r"\b([0-9]+)xSpecial ([0-9]+)\b", re.IGNORECASE), "d", "d"),
+    ("S00E00v0", re.compile(r"(?:-| |\[|.)S([0-9]+)E([0-9]+)v\d(?=[\] \-\[.])", re.IGNORECASE), "02d", "02d"),
+]
+
+# (label, regex, episode form, open ended)
+# Open ended patterns have nothing after the number, so every prefix of the digit
+# run is a match (e.g. "Vol.12" matches both 1 and 12).
+EPISODE_PATTERNS = [
+    ("^0", re.compile(r"^([0-9]+)(?=[. ])", re.IGNORECASE), "0?", False),
+    ("-0-", re.compile(r"[-\ \[(]([0-9]+)(?=[\] \-\[.)])", re.IGNORECASE), "0?", False),
+    ("-000-", re.compile(r"[-\ \[]([0-9]+)(?=[\] \-\[.])", re.IGNORECASE), "03d", False),
+    ("_0_", re.compile(r"_([0-9]+)(?=_)", re.IGNORECASE), "0?", False),
+    ("-00v0-", re.compile(r"[-\ \[_]([0-9]+)v\d(?=[(\] \-\[._])", re.IGNORECASE), "02d", False),
+    ("第0話", re.compile(r"第([0-9]+)(?=[弾話章话巻怪幕節夜回])", re.IGNORECASE), "0?", False),
+    (" EP0 ", re.compile(r" EP([0-9]+)(?= )", re.IGNORECASE), "0?", False),
+    (" Ep0_", re.compile(r"[ _]Ep([0-9]+)(?=[_ .])", re.IGNORECASE), "0?", False),
+    (" E0 ", re.compile(r" E([0-9]+)(?= )", re.IGNORECASE), "0?", False),
+    (".EP00.", re.compile(r"\.EP([0-9]+)(?=\.)", re.IGNORECASE), "02d", False),
+    ("Vol.0", re.compile(r"Vol\.([0-9]+)", re.IGNORECASE), "0?", True),
+    ("Epilogue.0", re.compile(r"Epilogue.([0-9]+)", re.IGNORECASE), "0?", True),
+    ("＃0", re.compile(r"＃([0-9]+)", re.IGNORECASE), "0?", True),
+    ("Episode 0", re.compile(r"Episode ([0-9]+)", re.IGNORECASE), "0?", True),
+    (" #0", re.compile(r" #([0-9]+)", re.IGNORECASE), "0?", True),
+    ("#0 ", re.compile(r"#([0-9]+)(?= )", re.IGNORECASE), "d|02d", False),
+    ("SP00", re.compile(r"SP([0-9]+)", re.IGNORECASE), "02d", True),
+    ("[00 END]", re.compile(r"\[([0-9]+) ?(?:END|FIN)\]", re.IGNORECASE), "02d", False),
+    ("[00_END]", re.compile(r"\[([0-9]+)_?(?:END|FIN)\]", re.IGNORECASE), "02d", False),
+    ("Part.0", re.compile(r"Part\.([0-9]+)", re.IGNORECASE), "0?", True),
+]
+
+MULTI_SEASON_PATTERN = re.compile(r"\bS([0-9]+)E([0-9]+)(?=-(\d{2,3})\b)", re.IGNORECASE)
+MULTI_EPISODE_PATTERN = re.compile(r"\b([0-9]+)(?=-(\d{2,3})\b)", re.IGNORECASE)
+
+# Files carrying an explicit season marker are never matched by bare episode numbers.
+SEASON_GUARD_PATTERNS = [
+    re.compile(r"S\d{2}E\d{2,3}", re.IGNORECASE),
+    re.compile(r"\b\d{2}x\d{2,3}\b", re.IGNORECASE),
+    re.compile(r"\d{1,2}xSpecial \d{1,3}", re.IGNORECASE),
+]
+
+ParsedName = namedtuple("ParsedName", ["season_hits", "episode_hits", "season_ranges", "episode_ranges", "has_season"])
+EpisodeMatch = namedtuple("EpisodeMatch", [
+    "season_number", "episode_number", "local_episode_number", "title", "range_end", "range_titles", "pattern",
+])
+
+
+def _number(digits, form):
+    """Returns the number `digits` encodes under the given padding form, or None."""
+    value = int(digits)
+    if form == "02d":
+        valid = digits == f"{value:02d}"
+    elif form == "03d":
+        valid = digits == f"{value:03d}"
+    elif form == "0?":
+        valid = digits in (str(value), f"0{value}")
+    elif form == "d":
+        valid = digits == str(value)
+    else:  # "d|02d"
+        valid = digits in (str(value), f"{value:02d}")
+    return value if valid else None
+
+
+def _numbers(digits, form, open_ended):
+    """Yields every number a digit run matches, including its prefixes for open ended patterns."""
+    lengths = range(1, len(digits) + 1) if open_ended else (len(digits),)
+    for length in lengths:
+        value = _number(digits[:length], form)
+        if value is not None:
+            yield value
+
+
+def parse_filename(filename):
+    """Parses a filename once into every (season, episode) and episode candidate it carries."""
+    name = normalize_filename(filename)
+
+    season_hits = {}
+    for label, pattern, season_form, episode_form in SEASON_PATTERNS:
+        for match in pattern.finditer(name):
+            season = _number(match.group(1), season_form)
+            episode = _number(match.group(2), episode_form)
+            if season is not None and episode is not None:
+                season_hits.setdefault((season, episode), label)
+
+    episode_hits = {}
+    for label, pattern, form, open_ended in EPISODE_PATTERNS:
+        for match in pattern.finditer(name):
+            for episode in _numbers(match.group(1), form, open_ended):
+                episode_hits.setdefault(episode, label)
+
+    season_ranges = {}
+    for match in MULTI_SEASON_PATTERN.finditer(name):
+        season = _number(match.group(1), "02d")
+        episode = _number(match.group(2), "02d")
+        if season is not None and episode is not None:
+            season_ranges.setdefault((season, episode), int(match.group(3)))
+
+    episode_ranges = {}
+    for match in MULTI_EPISODE_PATTERN.finditer(name):
+        episode = _number(match.group(1), "02d")
+        if episode is not None:
+            episode_ranges.setdefault(episode, int(match.group(2)))
+
+    has_season = any(pattern.search(filename) for pattern in SEASON_GUARD_PATTERNS)
+    return ParsedName(season_hits, episode_hits, season_ranges, episode_ranges, has_season)
+
+
+class EpisodeMatcher:
+    """Index of the cached TMDb episodes keyed by (season, local episode number).
+
+    Takes an EpisodeTable, or raw TMDb season responses keyed by season number, and an
+    episode shift or a ShiftConfig with per-season shifts and the numbering mode. Bare
+    episode numbers are looked up per season, or in one step in the absolute-number
+    index when the numbering is "absolute" ("auto" falls back to it). Outside "season"
+    numbering the episode shift is subtracted from the absolute numbers only, and seasons
+    are shifted by their own season_shifts entries alone.
+    """
+
+    def __init__(self, episode_table, episode_shift=0):
+        if not isinstance(episode_table, EpisodeTable):
+            episode_table = EpisodeTable.from_seasons(episode_table)
+        shift = episode_shift if isinstance(episode_shift, ShiftConfig) else ShiftConfig(episode_shift)
+        season_shifts = dict(shift.season_shifts)
+        self.table = episode_table
+        self.numbering = shift.numbering
+        # In absolute and auto numbering episode_shift applies to the absolute numbers only
+        default_shift = shift.episode_shift if shift.numbering == "season" else 0
+        self.shifts = {season_number: season_shifts.get(season_number, default_shift) for season_number in episode_table.seasons}
+        self.episodes = {}
+        self.by_local_episode = {}
+        self.by_absolute = {}
+        entries = []
+        for season_number, episodes in episode_table.seasons.items():
+            season_shift = self.shifts[season_number]
+            for episode in episodes:
+                entry = (len(entries), season_number, episode.episode, episode.episode - season_shift, episode.title)
+                entries.append((entry, episode.absolute))
+                # Allow zero-based local numbering (e.g. file uses 00 for episode 1)
+                if entry[3] < 0:
+                    continue
+                self.episodes.setdefault((season_number, entry[3]), entry)
+                self.by_local_episode.setdefault(entry[3], []).append(entry)
+        if shift.numbering != "season":
+            # Every regular episode, including those the per-season shift leaves without a local number
+            for entry, absolute in entries:
+                if absolute is not None:
+                    self.by_absolute.setdefault(absolute - shift.episode_shift, entry)
+
+    def match(self, filename, parsed=None):
+        """Yields the episodes a filename matches, in the same priority order as the season/episode scan.
+
+        `parsed` is the filename already run through parse_filename, if the caller has it.
+        """
+        if parsed is None:
+            parsed = parse_filename(filename)
+
+        candidates = {}
+        for key, label in parsed.season_hits.items():
+            entry = self.episodes.get(key)
+            if entry:
+                candidates[entry[0]] = (entry, label, None)
+        if not parsed.has_season:
+            for number, label in parsed.episode_hits.items():
+                entries = self.by_local_episode.get(number, ()) if self.numbering != "absolute" else ()
+                for entry in entries:
+                    candidates.setdefault(entry[0], (entry, label, None))
+                if not entries and number in self.by_absolute:
+                    entry = self.by_absolute[number]
+                    candidates.setdefault(entry[0], (entry, f"{label} abs", number))
+
+        for rank in sorted(candidates):
+            (_, season_number, tmdb_episode_number, local_episode_number, title), label, absolute_number = candidates[rank]
+            range_end, range_titles = self._episode_range(parsed, season_number, local_episode_number, absolute_number)
+            yield EpisodeMatch(season_number, tmdb_episode_number, local_episode_number, title, range_end, range_titles, label)
+
+    def _episode_range(self, parsed, season_number, local_episode_number, absolute_number=None):
+        """Returns the multi-episode range end and titles for a match, if the filename has one.
+
+        For an absolute match the range in the file name is absolute too and is moved into
+        the season; a range running past the end of the season is left out.
+        """
+        if absolute_number is not None:
+            range_end = parsed.episode_ranges.get(absolute_number)
+            if range_end is not None:
+                range_end += local_episode_number - absolute_number
+        else:
+            range_end = parsed.season_ranges.get((season_number, local_episode_number))
+            if range_end is None:
+                range_end = parsed.episode_ranges.get(local_episode_number)
+        if range_end is None or range_end < local_episode_number:
+            return None, None
+        season_shift = self.shifts[season_number]
+        season = self.table.seasons[season_number]
+        if absolute_number is not None and not any(episode.episode - season_shift == range_end for episode in season):
+            return None, None
+        range_titles = [episode.title for episode in season if local_episode_number <= episode.episode - season_shift <= range_end]
+        if not range_titles:
+            return None, None
+        return range_end, range_titles
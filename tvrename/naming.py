@@ -0,0 +1,73 @@
+# tvrename/naming.py
+import re
+
+DEFAULT_FORMAT = "{n} - {s00e00} - {t}"
+
+# {name} or {name.take(N)}; anything else in braces is kept as written
+PLACEHOLDER_PATTERN = re.compile(r"\{(n|t|s00e00|e|y|abs)(?:\.take\((\d+)\))?\}")
+
+
+def compile_format(format_string):
+    """Parses a --format string once into literal strings and (placeholder, take length) pairs."""
+    parts = []
+    position = 0
+    for match in PLACEHOLDER_PATTERN.finditer(format_string):
+        if match.start() > position:
+            parts.append(format_string[position:match.start()])
+        parts.append((match.group(1), int(match.group(2)) if match.group(2) else None))
+        position = match.end()
+    if position < len(format_string):
+        parts.append(format_string[position:])
+    return tuple(parts)
+
+
+class EpisodeNamer:
+    """Renders the new file name (without extension) of matched episodes from a compiled --format.
+
+    Placeholders: {n} series, {t} title, {s00e00} season and episode, {e} episode number,
+    {y} air year, {abs} absolute episode number (empty for specials), each optionally
+    truncated with .take(N). A name is rendered once per episode and reused for every
+    file matching it.
+    """
+
+    def __init__(self, format_string, series_name, matcher=None):
+        self.parts = compile_format(format_string or DEFAULT_FORMAT)
+        self.series_name = series_name
+        self.table = matcher.table if matcher else None
+        self.absolute_width = max(2, len(str(max(self.table.by_absolute, default=0)))) if self.table else 2
+        self.names = {}
+
+    def name(self, match):
+        key = (match.season_number, match.episode_number, match.local_episode_number, match.range_end)
+        name = self.names.get(key)
+        if name is None:
+            name = self.names[key] = self.render(match)
+        return name
+
+    def render(self, match):
+        values = self.values(match)
+        return "".join(part if isinstance(part, str) else values[part[0]][:part[1]] for part in self.parts)
+
+    def values(self, match):
+        """Returns the value of every placeholder for a match."""
+        season, episode = match.season_number, match.episode_number
+        record = self.table.get(season, episode) if self.table else None
+        absolute = f"{record.absolute:0{self.absolute_width}d}" if record and record.absolute else ""
+        if match.range_end is not None:
+            # The range in the file name is in local numbers, the name gets TMDb numbers like a single episode
+            length = match.range_end - match.local_episode_number
+            episode_numbers = f"{episode:02d}-{episode + length:02d}"
+            if absolute:
+                absolute = f"{absolute}-{int(absolute) + length:0{self.absolute_width}d}"
+            title = " ／ ".join(match.range_titles)
+        else:
+            episode_numbers = f"{episode:02d}"
+            title = match.title
+        return {
+            "n": self.series_name,
+            "t": title,
+            "s00e00": f"S{season:02d}E{episode_numbers}",
+            "e": episode_numbers,
+            "y": record.air_date[:4] if record else "",
+            "abs": absolute,
+        }
@@ -0,0 +1,106 @@
+# tvrename/plan.py
+import json
+import os
+from collections import namedtuple
+from datetime import datetime, timezone
+
+PLAN_VERSION = 1
+
+# Actions that take the source away from its current path; dry-run previews a rename
+MOVING_ACTIONS = ("rename", "dry-run")
+
+# status is "ok" (to be applied), "exists" (target already on disk) or "collision"
+# (target already claimed by the source named in conflict)
+PlanEntry = namedtuple("PlanEntry", [
+    "source", "target", "action", "status", "pattern",
+    "season", "episode", "local_episode", "range_end", "conflict",
+])
+
+
+def resolve_plan(entries):
+    """Flags collisions and blocked targets across the whole plan at once.
+
+    The first source claiming a target keeps it, later ones become collisions. A target
+    that exists on disk is only usable by a rename when the file there is itself renamed
+    away by the plan; this is re-checked until stable since blocking one rename can block
+    the rename that was waiting for it.
+    """
+    claimed = {}
+    resolved = []
+    for entry in entries:
+        if entry.status == "ok":
+            if entry.target in claimed:
+                entry = entry._replace(status="collision", conflict=claimed[entry.target])
+            else:
+                claimed[entry.target] = entry.source
+        resolved.append(entry)
+
+    changed = True
+    while changed:
+        changed = False
+        moving = {entry.source for entry in resolved if entry.status == "ok" and entry.action in MOVING_ACTIONS}
+        for i, entry in enumerate(resolved):
+            if entry.status != "ok" or not os.path.lexists(entry.target):
+                continue
+            if entry.action in MOVING_ACTIONS and entry.target in moving and entry.target != entry.source:
+                continue
+            resolved[i] = entry._replace(status="exists")
+            changed = True
+    return resolved
+
+
+def execution_steps(entries):
+    """Orders a plan into ("skip" | "apply" | "stash", entry) steps, keeping plan order where possible.
+
+    A rename whose target is still held by another renamed source runs after it. Swap
+    cycles (A -> B, B -> A) are broken by first stashing one source under a temporary name.
+    """
+    by_source = {entry.source: entry for entry in entries if entry.status == "ok" and entry.action in MOVING_ACTIONS}
+    done = set()
+    steps = []
+    for entry in entries:
+        if entry.status != "ok":
+            steps.append(("skip", entry))
+            continue
+        if entry.action not in MOVING_ACTIONS:
+            steps.append(("apply", entry))
+            continue
+        if entry.source in done:
+            continue
+
+        # Follow the chain of renames blocking this one; targets are unique so it is a path or a cycle
+        path = [entry]
+        blocker = by_source.get(entry.target)
+        while blocker is not None and blocker is not path[-1] and blocker.source not in done:
+            if blocker in path:
+                steps.append(("stash", blocker))
+                break
+            path.append(blocker)
+            blocker = by_source.get(blocker.target)
+        for waiting in reversed(path):
+            steps.append(("apply", waiting))
+            done.add(waiting.source)
+    return steps
+
+
+def save_plan(path, entries, series=None):
+    """Writes a plan to a JSON file."""
+    data = {
+        "version": PLAN_VERSION,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "series": series,
+        "entries": [entry._asdict() for entry in entries],
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+def load_plan(path):
+    """Reads a plan written by save_plan and re-checks it against the filesystem."""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    if data.get("version") != PLAN_VERSION:
+        raise Exception(f"Unsupported plan version {data.get('version')} in {path}")
+    entries = [PlanEntry(**entry) for entry in data["entries"]]
+    # Statuses are recomputed: the plan may be applied on another machine or much later
+    return resolve_plan([entry._replace(status="ok", conflict=None) for entry in entries])
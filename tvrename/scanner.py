@@ -0,0 +1,108 @@
+# tvrename/scanner.py
+import os
+from collections import deque
+from fnmatch import fnmatch
+from glob import glob
+from pathlib import Path
+from .utils import SUBTITLE_EXTENSIONS, VIDEO_EXTENSIONS
+
+# Files still being downloaded or written, and BitComet padding files
+TEMP_PATTERNS = ["*.part", "*.partial", "*.tmp", "*.temp", "*.!qb", "*.!ut", "*.bc!", "*.crdownload", "*.aria2", "*~", "~$*", "*BitComet*"]
+
+EXTENSION_GROUPS = {
+    "video": VIDEO_EXTENSIONS,
+    "subtitle": SUBTITLE_EXTENSIONS,
+}
+
+
+def expand_extensions(extensions):
+    """Expands extension arguments ("mkv", ".ass", "video", "subtitle") to a set of suffixes."""
+    if not extensions:
+        return None
+    expanded = set()
+    for extension in extensions:
+        extension = extension.lower()
+        if extension in EXTENSION_GROUPS:
+            expanded.update(EXTENSION_GROUPS[extension])
+        else:
+            expanded.add(extension if extension.startswith(".") else f".{extension}")
+    return expanded
+
+
+class InputScanner:
+    """Walks the input paths once with os.scandir, yielding files lazily in a stable order.
+
+    The first .config met on the way (the shallowest one, as directories are walked
+    breadth first) is recorded in config_path. Hidden entries and temporary download
+    files are skipped; include/exclude globs and the extension filter apply to file names.
+    """
+
+    def __init__(self, inputs, recursive=False, include=None, exclude=None, extensions=None):
+        self.inputs = inputs
+        self.recursive = recursive
+        self.include = include or []
+        self.exclude = (exclude or []) + TEMP_PATTERNS
+        self.extensions = expand_extensions(extensions)
+        self.config_path = None
+
+    def wanted(self, name):
+        """Returns True if a file name passes the include, exclude and extension filters."""
+        if name.startswith("."):
+            return False
+        if self.extensions is not None and os.path.splitext(name)[1].lower() not in self.extensions:
+            return False
+        if self.include and not any(fnmatch(name, pattern) for pattern in self.include):
+            return False
+        return not any(fnmatch(name, pattern) for pattern in self.exclude)
+
+    def __iter__(self):
+        for input_pattern in self.inputs:
+            # Resolve input path
+            input_path = Path(input_pattern).resolve()
+
+            if '*' in input_pattern:
+                # Find the directory containing the wildcard
+                base_dir = Path(os.path.dirname(input_pattern)).resolve()
+                if not base_dir.exists():
+                    print(f"Error: The specified input path does not exist: {base_dir}")
+                    continue  # Skip to the next pattern
+
+                # Use glob to find files matching the wildcard
+                found_files = [Path(f).resolve() for f in sorted(glob(input_pattern))]
+                if not found_files:
+                    print(f"Warning: No files found matching the wildcard: {input_pattern}")  # Changed to warning
+                    continue  # Skip to the next pattern
+                for path in found_files:
+                    if path.is_file() and self.wanted(path.name):
+                        yield path
+            elif not input_path.exists():
+                print(f"Error: The specified input path does not exist: {input_path}")
+            elif input_path.is_file():
+                yield input_path  # Files named explicitly are never filtered
+            else:
+                yield from self._walk(input_path)
+
+    def _walk(self, root):
+        pending = deque([root])
+        while pending:
+            directory = pending.popleft()
+            try:
+                with os.scandir(directory) as it:
+                    entries = sorted(it, key=lambda entry: entry.name)
+            except OSError as e:
+                print(f"Warning: Cannot read directory {directory}: {e.strerror}")
+                continue
+            for entry in entries:
+                try:
+                    if entry.name == ".config":
+                        if self.config_path is None and entry.is_file():
+                            self.config_path = Path(entry.path)
+                    elif entry.name.startswith("."):
+                        continue
+                    elif entry.is_dir():
+                        if self.recursive:
+                            pending.append(entry.path)
+                    elif entry.is_file() and self.wanted(entry.name):
+                        yield Path(entry.path)
+                except OSError:
+                    continue
@@ -0,0 +1,152 @@
+# tvrename/stats.py
+import json
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+from .matcher import SEASON_PATTERNS, EPISODE_PATTERNS, SEASON_GUARD_PATTERNS
+
+STAGES = ["config", "scan", "metadata", "match", "action"]
+
+# parse_filename runs every pattern once per file, plus the two range patterns
+REGEXES_PER_FILE = len(SEASON_PATTERNS) + len(EPISODE_PATTERNS) + 2 + len(SEASON_GUARD_PATTERNS)
+
+# Bold colors
+green_bold = "\033[1;32m"
+
+# Reset
+reset = "\033[0m"
+
+
+def percentile(values, fraction):
+    """Returns the nearest-rank percentile of a list of numbers, or None when it is empty."""
+    if not values:
+        return None
+    values = sorted(values)
+    return values[max(0, math.ceil(fraction * len(values)) - 1)]
+
+
+class RunStats:
+    """Per-stage wall time and counters for one run, shared by every series of a --library run.
+
+    Stage times add up across threads, so in library mode they can exceed the total time.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = dict.fromkeys(STAGES, 0.0)
+        self.counters = {"files": 0, "parsed": 0, "journal_skipped": 0, "matched": 0, "title_matched": 0, "applied": 0, "identical": 0, "resumed": 0, "conflicts": 0, "bytes_copied": 0, "copy_seconds": 0.0}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name):
+        """Adds the wall time of the block to a stage."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def add_time(self, name, seconds):
+        with self._lock:
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def summary(self, client=None):
+        """Returns the statistics as a JSON-serializable dict, with the client's HTTP and cache counters."""
+        data = {
+            "total_seconds": time.perf_counter() - self.started,
+            "stages": dict(self.stages),
+            **self.counters,
+            "regex_evaluations": self.counters["parsed"] * REGEXES_PER_FILE,
+            "regex_evaluations_per_file": REGEXES_PER_FILE,
+        }
+        if client is not None:
+            latencies = list(client.latencies)
+            data["http"] = {
+                **client.counters,
+                "latency_p50": percentile(latencies, 0.50),
+                "latency_p90": percentile(latencies, 0.90),
+                "latency_p99": percentile(latencies, 0.99),
+                "latency_max": max(latencies) if latencies else None,
+            }
+            if client.cache is not None:
+                cache = client.cache
+                lookups = cache.hits + cache.misses
+                data["cache"] = {
+                    "hits": cache.hits,
+                    "misses": cache.misses,
+                    "revalidated": cache.revalidated,
+                    "hit_rate": cache.hits / lookups if lookups else None,
+                }
+        return data
+
+    def print_summary(self, client=None):
+        """Prints the statistics in a human readable form."""
+        data = self.summary(client)
+        print(f"\n{green_bold}Run statistics:{reset}")
+        print(f"Total: {data['total_seconds']:.3f} s")
+        for name, seconds in data["stages"].items():
+            print(f"  {name:<9} {seconds:>9.3f} s")
+        print(f"Files: {data['files']} scanned, {data['journal_skipped']} unchanged since an earlier run, {data['matched']} matched ({data['title_matched']} by title), {data['applied']} processed")
+        print(f"Regex evaluations: {data['regex_evaluations']} ({data['regex_evaluations_per_file']} per parsed file, {data['parsed']} parsed)")
+        if "http" in data:
+            http = data["http"]
+            latency = ", ".join(
+                f"{label} {http[key] * 1000:.0f} ms" for label, key in (("p50", "latency_p50"), ("p90", "latency_p90"), ("p99", "latency_p99"), ("max", "latency_max"))
+                if http[key] is not None
+            )
+            print(f"HTTP requests: {http['requests']} ({http['retries']} retried){', latency ' + latency if latency else ''}, rate limiter wait {http['limiter_wait']:.3f} s")
+        if "cache" in data:
+            cache = data["cache"]
+            hit_rate = f"{cache['hit_rate']:.0%}" if cache["hit_rate"] is not None else "n/a"
+            print(f"Metadata cache: {cache['hits']} hits, {cache['misses']} misses, {cache['revalidated']} revalidated (hit rate {hit_rate})")
+        if data["identical"] or data["resumed"] or data["conflicts"]:
+            print(f"Existing targets: {data['identical']} identical, {data['resumed']} resumed or replaced, {data['conflicts']} conflicting")
+        if data["bytes_copied"]:
+            from .fileops import format_size, format_throughput
+            print(f"Copied: {format_size(data['bytes_copied'])} ({format_throughput(data['bytes_copied'], data['copy_seconds'])})")
+
+    def write_json(self, path, client=None):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.summary(client), f, indent=2)
+
+
+@contextmanager
+def profiled(path, profiler="cprofile"):
+    """Profiles the block with cProfile or pyinstrument and writes the report to path.
+
+    cProfile writes a pstats file (for snakeviz, pstats, ...) and prints the top functions,
+    pyinstrument writes an HTML report when path ends in .html and text otherwise.
+    """
+    if profiler == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            raise Exception("--profiler pyinstrument needs pyinstrument: pip install pyinstrument")
+        profile = Profiler()
+        profile.start()
+        try:
+            yield
+        finally:
+            profile.stop()
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(profile.output_html() if path.endswith(".html") else profile.output_text())
+            print(f"Profile written to {path}")
+        return
+
+    import cProfile
+    import pstats
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        yield
+    finally:
+        profile.disable()
+        profile.dump_stats(path)
+        print(f"\nProfile written to {path}, top functions by cumulative time:")
+        pstats.Stats(profile).sort_stats("cumulative").print_stats(15)
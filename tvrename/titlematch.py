@@ -0,0 +1,110 @@
+# tvrename/titlematch.py
+import re
+from functools import lru_cache
+from .matcher import EpisodeMatch
+from .utils import normalize_filename, get_full_extension
+from .defaults import DEFAULT_TITLE_THRESHOLD
+
+# Release group tags, resolutions, codecs and the like carry nothing of the title
+BRACKETS_PATTERN = re.compile(r"\[[^\]]*\]|\([^)]*\)|【[^】]*】|「|」|『|』")
+NOISE_PATTERN = re.compile(
+    r"\b(?:\d{3,4}p|[248]k|x26[45]|h\.?26[45]|hevc|avc|aac|flac|ac3|opus|10bit|8bit|web-?dl|webrip|bdrip|bluray|hdtv|dvdrip|remux)\b",
+    re.IGNORECASE,
+)
+NON_WORD_PATTERN = re.compile(r"[\W_]+")
+
+_kakasi = None
+
+
+@lru_cache(maxsize=None)
+def romanize(text):
+    """Romanizes kana and kanji with pykakasi (Hepburn), leaving other text as is. Memoized."""
+    if text.isascii():
+        return text
+    global _kakasi
+    if _kakasi is None:
+        import pykakasi
+        _kakasi = pykakasi.kakasi()
+    return " ".join(item["hepburn"] or item["orig"] for item in _kakasi.convert(text))
+
+
+@lru_cache(maxsize=None)
+def normalize_title(text, use_kakasi=True):
+    """Reduces a title to lowercase words for comparison: NFKC, romanized, punctuation dropped."""
+    text = normalize_filename(text)
+    if use_kakasi:
+        text = romanize(text)
+    return " ".join(NON_WORD_PATTERN.sub(" ", text.lower()).split())
+
+
+class TitleMatcher:
+    """Matches files without a usable episode number to episode titles with rapidfuzz.
+
+    Every episode title is normalized once when the matcher is built. All file names are
+    then scored against all titles in one process.cdist call and paired one-to-one, best
+    score first, keeping only pairs at or above the threshold.
+    """
+
+    def __init__(self, matcher, series_name, threshold=DEFAULT_TITLE_THRESHOLD):
+        try:
+            import numpy
+            from rapidfuzz import fuzz, process
+        except ImportError:
+            raise Exception("--title-match needs rapidfuzz (and numpy). Install them with: pip install -e .[titlematch]")
+        try:
+            import pykakasi  # noqa: F401
+            self.use_kakasi = True
+        except ImportError:
+            print("Warning: pykakasi is not installed, Japanese titles are compared without romanization.")
+            self.use_kakasi = False
+        self.numpy = numpy
+        self.fuzz = fuzz
+        self.process = process
+        self.threshold = threshold
+        self.series_name = normalize_title(series_name, self.use_kakasi)
+        # (rank, season, tmdb episode, local episode, title) of every episode, in match priority order
+        self.episodes = sorted(matcher.episodes.values())
+        self.titles = [normalize_title(entry[4], self.use_kakasi) for entry in self.episodes]
+
+    def normalize_file(self, filename):
+        """Normalizes a file name like a title, without its extension, tags and the series name."""
+        stem = filename[:-len(get_full_extension(filename))] if get_full_extension(filename) else filename
+        stem = BRACKETS_PATTERN.sub(" ", normalize_filename(stem))
+        stem = NOISE_PATTERN.sub(" ", stem.replace(".", " "))
+        name = normalize_title(stem, self.use_kakasi)
+        if self.series_name and name.startswith(self.series_name):
+            name = name[len(self.series_name):].strip()
+        return name
+
+    def match_files(self, files, exclude=()):
+        """Returns {file: EpisodeMatch} for the files whose name is close enough to an episode title.
+
+        Episodes whose (season, episode) is in exclude, e.g. because a numbered file already
+        matched them, are not offered. Each file and each episode is used at most once.
+        """
+        choices = [i for i, entry in enumerate(self.episodes) if (entry[1], entry[2]) not in exclude and self.titles[i]]
+        queries = [(file, self.normalize_file(file.name)) for file in files]
+        queries = [(file, name) for file, name in queries if name]
+        if not choices or not queries:
+            return {}
+
+        scores = self.process.cdist(
+            [name for _, name in queries], [self.titles[i] for i in choices],
+            scorer=self.fuzz.WRatio, score_cutoff=self.threshold, workers=-1,
+        )
+        rows, columns = scores.nonzero()
+        # Best score first; ties go to the earlier file, then the earlier episode (nonzero is row-major)
+        order = self.numpy.argsort(-scores[rows, columns], kind="stable")
+
+        matches = {}
+        used = set()
+        for row, column in zip(rows[order].tolist(), columns[order].tolist()):
+            file = queries[row][0]
+            if file in matches or column in used:
+                continue
+            used.add(column)
+            _, season_number, tmdb_episode_number, local_episode_number, title = self.episodes[choices[column]]
+            matches[file] = EpisodeMatch(season_number, tmdb_episode_number, local_episode_number, title, None, None, f"title ({scores[row, column]:.0f})")
+            if len(matches) == len(queries) or len(used) == len(choices):
+                break
+        return matches
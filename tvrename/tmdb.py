@@ -0,0 +1,216 @@
+# tvrename/tmdb.py
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from .defaults import DEFAULT_TIMEOUT, DEFAULT_WORKERS, DEFAULT_RATE_LIMIT, DEFAULT_MAX_RETRIES
+
+# Overridable so tvrename can be pointed at a mirror or a local stand-in
+TMDB_API_URL = os.getenv("TMDB_API_URL", "https://api.themoviedb.org/3")
+
+BACKOFF_BASE = 0.5  # Seconds, doubled on every retry
+BACKOFF_MAX = 30
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class TMDbRequestError(Exception):
+    """Raised when TMDb answers with an unexpected status code or cannot be reached.
+
+    For connection errors and timeouts status_code holds the name of the requests exception.
+    """
+
+    def __init__(self, status_code, text=""):
+        super().__init__(f"{status_code} - {text}")
+        self.status_code = status_code
+        self.text = text
+
+
+def is_airing(series_details):
+    """Returns True if TMDb reports the series as still in production."""
+    return bool(series_details.get("in_production")) or series_details.get("status") in ("Returning Series", "In Production", "Planned")
+
+
+def retry_after_seconds(value):
+    """Parses a Retry-After header given either in seconds or as an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    from email.utils import parsedate_to_datetime
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RateLimiter:
+    """Thread-safe token bucket shared by every request of a client."""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.capacity = burst or max(1, int(rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Blocks until a token is available and returns the number of seconds waited."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if now >= self.paused_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = max(self.paused_until - now, (1 - self.tokens) / self.rate)
+            time.sleep(delay)
+            waited += delay
+
+    def pause(self, seconds):
+        """Holds back every caller for the given number of seconds (e.g. after a 429)."""
+        with self._lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = 0
+
+
+class TMDbClient:
+    """TMDb API client with a pooled HTTP session, rate limiting, retries and the metadata cache.
+
+    With a MetadataBundle, series and seasons are resolved from the bundle and the client
+    refuses to send any request. `api_key` can be a function returning the key: it is
+    called, like requests is imported and the session opened, at the first request, so
+    runs answered from the cache or a bundle need neither.
+    """
+
+    def __init__(self, api_key, cache=None, timeout=DEFAULT_TIMEOUT, workers=DEFAULT_WORKERS,
+                 rate_limit=DEFAULT_RATE_LIMIT, max_retries=DEFAULT_MAX_RETRIES, bundle=None):
+        self.api_key = api_key
+        self.cache = cache
+        self.bundle = bundle
+        self.timeout = timeout
+        self.workers = max(1, workers)
+        self.limiter = RateLimiter(rate_limit) if rate_limit and rate_limit > 0 else None
+        self.max_retries = max(0, max_retries)
+        self.counters = {"requests": 0, "retries": 0, "throttled": 0, "server_errors": 0, "connection_errors": 0, "limiter_wait": 0.0}
+        self.latencies = []  # Seconds per HTTP attempt, for --stats
+        self._counters_lock = threading.Lock()
+        self._session_lock = threading.Lock()
+        self.session = None
+
+    def _open_session(self):
+        """Resolves the API key and opens the pooled HTTP session, once."""
+        with self._session_lock:
+            if self.session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                if callable(self.api_key):
+                    self.api_key = self.api_key()
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=self.workers, pool_maxsize=self.workers)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self.session = session
+        return self.session
+
+    def get(self, path, params, key=None, airing=None):
+        """Fetches a TMDb endpoint as JSON, going through the metadata cache when a key is given.
+
+        Fresh cache entries are returned without touching the network. Stale entries are
+        revalidated with If-None-Match/If-Modified-Since and reused on a 304 response.
+        `airing` selects the shorter TTL; when None it is derived from the response itself.
+        """
+        cache = self.cache if key else None
+        cached = cache.get(key) if cache else None
+        headers = {}
+        if cached:
+            data, fresh, etag, last_modified = cached
+            if fresh:
+                cache.hits += 1
+                return data
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+        if cache:
+            cache.misses += 1
+
+        response = self._request(path, params, headers)
+        if response.status_code == 304 and cached:
+            cache.revalidated += 1
+            cache.renew(key, is_airing(cached[0]) if airing is None else airing)
+            return cached[0]
+        if response.status_code != 200:
+            raise TMDbRequestError(response.status_code, response.text)
+
+        data = response.json()
+        if cache:
+            cache.put(key, data, is_airing(data) if airing is None else airing, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+        return data
+
+    def _request(self, path, params, headers):
+        """Sends one GET through the rate limiter, retrying throttled and failed attempts.
+
+        429 and 5xx responses, timeouts and connection errors are retried up to max_retries
+        times with exponential backoff and full jitter, or after Retry-After when TMDb sends it.
+        """
+        if self.bundle is not None:
+            raise TMDbRequestError("offline", f"{path} is not in the metadata bundle {self.bundle.path}")
+        import requests
+        session = self.session or self._open_session()
+        attempt = 0
+        while True:
+            if self.limiter:
+                waited = self.limiter.acquire()
+                self._count("limiter_wait", waited)
+            self._count("requests")
+            start = time.perf_counter()
+            try:
+                response = session.get(
+                    f"{TMDB_API_URL}{path}", params={"api_key": self.api_key, **params}, headers=headers, timeout=self.timeout,
+                )
+            except requests.RequestException as e:
+                self.latencies.append(time.perf_counter() - start)
+                self._count("connection_errors")
+                if attempt >= self.max_retries:
+                    raise TMDbRequestError(type(e).__name__, str(e))
+                delay = None
+            else:
+                self.latencies.append(time.perf_counter() - start)
+                if response.status_code not in RETRY_STATUS_CODES or attempt >= self.max_retries:
+                    return response
+                self._count("throttled" if response.status_code == 429 else "server_errors")
+                delay = retry_after_seconds(response.headers.get("Retry-After"))
+
+            if delay is None:
+                delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+            elif self.limiter:
+                self.limiter.pause(delay)
+            attempt += 1
+            self._count("retries")
+            time.sleep(delay)
+
+    def _count(self, name, amount=1):
+        with self._counters_lock:
+            self.counters[name] += amount
+
+    def map(self, func, items):
+        """Runs func over items on the client's worker threads, returning results in input order."""
+        items = list(items)
+        if self.workers == 1 or len(items) <= 1:
+            return [func(item) for item in items]
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(items))) as executor:
+            return list(executor.map(func, items))
+
+    def close(self):
+        if self.session is not None:
+            self.session.close()
+        if self.cache is not None:
+            self.cache.close()
+        if self.bundle is not None:
+            self.bundle.close()
@@ -2,28 +2,19 @@
 import re
 import unicodedata
 
+SUBTITLE_EXTENSIONS = ['.ass', '.srt', '.ssa', '.sub', '.vtt', '.smi', '.lrc', '.txt']
+VIDEO_EXTENSIONS = ['.mkv', '.mp4', '.avi', '.m4v', '.mov', '.wmv', '.ts', '.m2ts', '.webm', '.flv', '.rmvb', '.mpg', '.mpeg', '.ogm']
+
+# Full-width look-alikes for characters that are invalid or awkward in file names, the
+# rest of the invalid ones are dropped
+SANITIZE_TABLE = str.maketrans({
+    ".": "﹒", ":": "：", "?": "？", "'": "’", "/": "／", "!": "！", ";": "；",
+    "<": None, ">": None, '"': None, "\\": None, "|": None, "*": None,
+})
+
 def sanitize_filename(name):
     """Sanitizes a filename by removing or replacing invalid characters."""
-    name = name.replace(".", "﹒")
-    name = name.replace(":", "：")
-    name = name.replace("?", "？")
-    name = name.replace("'", "’")
-    name = name.replace("/", "／")
-    name = name.replace("!", "！")
-    name = name.replace(";", "；")
-    return re.sub(r'[<>:"/\\|?*]', '', name)
-
-def truncate_string(string, length):
-    """Truncates a string to a specified length."""
-    return string[:length] if len(string) > length else string
-
-def apply_truncation(format_string, placeholder, value):
-    """Applies truncation based on `.take({length})` syntax."""
-    match = re.search(rf"\{{{placeholder}\.take\((\d+)\)\}}", format_string)
-    if match:
-        length = int(match.group(1))
-        return format_string.replace(f"{{{placeholder}.take({length})}}", truncate_string(value, length))
-    return format_string.replace(f"{{{placeholder}}}", value)
+    return name.translate(SANITIZE_TABLE)
 
 def extract_from_folder_name(folder_name):
     """Extracts TMDb ID or series name from folder name."""
@@ -34,8 +25,7 @@ def extract_from_folder_name(folder_name):
 
 def get_full_extension(filename):
     """Gets the full extension for subtitle files, including language codes."""
-    subtitle_exts = ['.ass', '.srt', '.ssa', '.sub', '.vtt', '.smi', '.lrc', '.txt']
-    for ext in subtitle_exts:
+    for ext in SUBTITLE_EXTENSIONS:
         if filename.lower().endswith(ext):
             # Check for language code before the extension
             pattern = rf'(\.[a-zA-Z0-9-]+)?{re.escape(ext)}$'
@@ -47,6 +37,18 @@ def get_full_extension(filename):
     from pathlib import Path
     return Path(filename).suffix
 
+# Language and flag tags between a subtitle's stem and its extension (.ja, .en-US, .zh_Hans, .forced)
+SUBTITLE_TAG_PATTERN = re.compile(r"(?:\.[a-z]{2,3}(?:[-_][a-z0-9]{2,4})?)?(?:\.(?:forced|sdh|cc|default))?$", re.IGNORECASE)
+
+def sibling_stem(filename):
+    """Returns the name a file shares with its siblings: "Show - 01.ja.ass" and "Show - 01.mkv" give "Show - 01"."""
+    stem, _, extension = filename.rpartition(".")
+    if not stem:
+        return filename
+    if f".{extension.lower()}" in SUBTITLE_EXTENSIONS:
+        stem = SUBTITLE_TAG_PATTERN.sub("", stem, count=1) or stem
+    return stem
+
 def normalize_filename(filename):
     # NFKC normalization converts full-width characters to half-width
     normalized = unicodedata.normalize('NFKC', filename)
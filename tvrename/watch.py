@@ -0,0 +1,217 @@
+# tvrename/watch.py
+import os
+import select
+import struct
+import sys
+import time
+
+from .defaults import DEFAULT_SETTLE, DEFAULT_POLL_INTERVAL
+
+CLOSED_SETTLE = 1.0  # Same, once the writer closed the file (inotify only)
+UNMATCHED_REFRESH_MINUTES = 10  # A file matching no episode refreshes the metadata at most this often
+
+# inotify(7) event masks
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+EVENT_HEADER = struct.Struct("iIII")
+
+
+def _directories(root, recursive):
+    """Yields root and, when recursive, every non-hidden directory below it."""
+    yield root
+    if not recursive:
+        return
+    try:
+        with os.scandir(root) as entries:
+            subdirectories = sorted(entry.path for entry in entries if entry.is_dir(follow_symlinks=False) and not entry.name.startswith("."))
+    except OSError:
+        return
+    for directory in subdirectories:
+        yield from _directories(directory, recursive)
+
+
+def _files(directory):
+    try:
+        with os.scandir(directory) as entries:
+            return [entry.path for entry in entries if entry.is_file()]
+    except OSError:
+        return []
+
+
+class InotifyWatcher:
+    """Reports files written, moved in or created under the watched roots, through Linux inotify.
+
+    read() blocks in select() until something happens, so an idle watch costs no CPU.
+    """
+
+    def __init__(self, roots, recursive=False):
+        import ctypes.util  # Only the inotify watcher needs ctypes
+
+        self.recursive = recursive
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.watches = {}
+        for root in roots:
+            for directory in _directories(root, recursive):
+                self._add(directory)
+
+    def _add(self, directory):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            import ctypes
+            errno = ctypes.get_errno()
+            print(f"Warning: Cannot watch {directory}: {os.strerror(errno)}")
+            return False
+        self.watches[wd] = directory
+        return True
+
+    def read(self, timeout):
+        """Waits up to timeout seconds (None: forever) and returns [(path, closed)] of changed files."""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        changes = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+            directory = self.watches.get(wd)
+            if mask & IN_Q_OVERFLOW:
+                print("Warning: inotify queue overflowed, rescanning the watched folders")
+                for watched in list(self.watches.values()):
+                    changes.extend((path, False) for path in _files(watched))
+                continue
+            if mask & IN_IGNORED or directory is None:
+                self.watches.pop(wd, None)
+                continue
+            path = os.path.join(directory, name)
+            if mask & IN_ISDIR:
+                # A new folder may already hold files by the time it is watched
+                if self.recursive and mask & (IN_CREATE | IN_MOVED_TO) and not name.startswith("."):
+                    for subdirectory in _directories(path, True):
+                        if self._add(subdirectory):
+                            changes.extend((file, False) for file in _files(subdirectory))
+                continue
+            if name:
+                changes.append((path, bool(mask & (IN_CLOSE_WRITE | IN_MOVED_TO))))
+        return changes
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """Fallback for systems without inotify: compares (size, mtime) snapshots every interval."""
+
+    def __init__(self, roots, recursive=False, interval=DEFAULT_POLL_INTERVAL):
+        self.roots = roots
+        self.recursive = recursive
+        self.interval = interval
+        self.snapshot = self._snapshot()
+
+    def _snapshot(self):
+        snapshot = {}
+        for root in self.roots:
+            for directory in _directories(root, self.recursive):
+                try:
+                    with os.scandir(directory) as entries:
+                        for entry in entries:
+                            if entry.is_file():
+                                stat = entry.stat()
+                                snapshot[entry.path] = (stat.st_size, stat.st_mtime_ns)
+                except OSError:
+                    continue
+        return snapshot
+
+    def read(self, timeout):
+        time.sleep(self.interval if timeout is None else min(timeout, self.interval))
+        snapshot = self._snapshot()
+        changes = [(path, False) for path, state in snapshot.items() if self.snapshot.get(path) != state]
+        self.snapshot = snapshot
+        return sorted(changes)
+
+    def close(self):
+        pass
+
+
+def open_watcher(roots, recursive=False, poll=False, poll_interval=DEFAULT_POLL_INTERVAL):
+    """Returns an InotifyWatcher on Linux, or a PollingWatcher when inotify is unavailable or poll is set."""
+    if not poll and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(roots, recursive)
+        except (OSError, AttributeError) as e:
+            print(f"Warning: inotify is not available ({e}), polling every {poll_interval:g} s instead")
+    return PollingWatcher(roots, recursive, poll_interval)
+
+
+class PendingFiles:
+    """Files seen changing that are held back until they stop growing.
+
+    A file is ready once its size and mtime have not changed for `settle` seconds, or for
+    CLOSED_SETTLE seconds after its writer closed it.
+    """
+
+    def __init__(self, settle=DEFAULT_SETTLE):
+        self.settle = settle
+        self.files = {}  # path: [(size, mtime_ns), stable since, closed]
+
+    def __len__(self):
+        return len(self.files)
+
+    def touch(self, path, closed=False):
+        """Records an event for path; closed means its writer closed it or it was moved in whole."""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            self.files.pop(path, None)
+            return
+        current = (stat.st_size, stat.st_mtime_ns)
+        state = self.files.get(path)
+        if state is None or state[0] != current:
+            self.files[path] = [current, time.monotonic(), closed or bool(state and state[2])]
+        elif closed:
+            state[2] = True
+
+    def _wait(self, closed):
+        return min(self.settle, CLOSED_SETTLE) if closed else self.settle
+
+    def next_check(self):
+        """Seconds until the next pending file could be ready, None when nothing is pending."""
+        if not self.files:
+            return None
+        now = time.monotonic()
+        return max(0.1, min(since + self._wait(closed) - now for _, since, closed in self.files.values()))
+
+    def ready(self):
+        """Returns the pending files that settled, forgetting them and any that disappeared."""
+        now = time.monotonic()
+        ready = []
+        for path, state in list(self.files.items()):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                del self.files[path]
+                continue
+            current = (stat.st_size, stat.st_mtime_ns)
+            if current != state[0]:
+                state[0], state[1] = current, now
+            elif now - state[1] >= self._wait(state[2]):
+                ready.append(path)
+                del self.files[path]
+        return sorted(ready)